@@ -0,0 +1,173 @@
+"""Pre-synthesized speech for the agent's fixed prompts.
+
+The greeting, the slot questions and the planning filler are the same text
+on every call, so their audio is synthesized once and kept in
+AUDIO_CACHE_DIR as raw 16-bit PCM files, content-addressed by text, voice,
+model and sample rate (a changed voice or wording simply misses). Files are
+memory-mapped and played as 20 ms frames straight from the page cache,
+which every job process on the host shares. A miss goes through TTS as
+usual, and the audio is written to the cache while it plays.
+
+Synthesize the known prompts ahead of time (needs CARTESIA_API_KEY) with
+
+    python audio_cache.py
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import struct
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from livekit import rtc
+
+load_dotenv()
+
+AUDIO_CACHE = os.getenv("AUDIO_CACHE", "1") == "1"
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "audio_cache")
+
+FRAME_MS = 20
+# File header: format tag, sample rate, channels; 16-bit little-endian samples follow
+HEADER = struct.Struct("<8sIH")
+MAGIC = b"PCM16LE1"
+
+
+def audio_key(text: str, voice: str, model: str, sample_rate: int) -> str:
+    return hashlib.sha256("\0".join((model, voice, str(sample_rate), text)).encode()).hexdigest()
+
+
+def split_known(text: str, prompts: Iterable[str]) -> List[Tuple[str, bool]]:
+    """Splits `text` into (part, is a known prompt) pieces, in order.
+
+    Replies are often built from a fixed prompt plus something specific to
+    the caller ("Perfect! $3000 is a great budget..." + the next question).
+    """
+    text = text.strip()
+    if not text:
+        return []
+    for prompt in sorted(prompts, key=len, reverse=True):
+        i = text.find(prompt)
+        if i >= 0:
+            return split_known(text[:i], prompts) + [(prompt, True)] + split_known(text[i + len(prompt):], prompts)
+    return [(text, False)]
+
+
+class AudioCache:
+    """Content-addressed PCM files for fixed prompts, memory-mapped on first use."""
+
+    def __init__(self, voice: str, model: str, directory: str = AUDIO_CACHE_DIR):
+        self.voice = voice
+        self.model = model
+        self.directory = directory
+        # key -> (mapping, sample rate, channels); kept open for the life of the process
+        self._maps: Dict[str, Tuple[mmap.mmap, int, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def _open(self, key: str) -> Optional[Tuple[mmap.mmap, int, int]]:
+        cached = self._maps.get(key)
+        if cached is not None:
+            return cached
+        try:
+            with open(self.path(key), "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # Missing, or empty and so not mappable
+            return None
+        magic, sample_rate, channels = HEADER.unpack_from(data) if len(data) >= HEADER.size else (None, 0, 0)
+        if magic != MAGIC or not sample_rate or not channels:
+            data.close()
+            return None
+        self._maps[key] = (data, sample_rate, channels)
+        return self._maps[key]
+
+    def contains(self, text: str, sample_rate: int) -> bool:
+        return self._open(audio_key(text, self.voice, self.model, sample_rate)) is not None
+
+    def speech(self, text: str, tts) -> AsyncIterator[rtc.AudioFrame]:
+        """Frames of `text` spoken by `tts`: from the cache, or synthesized and cached."""
+        key = audio_key(text, self.voice, self.model, tts.sample_rate)
+        cached = self._open(key)
+        if cached is not None:
+            self.hits += 1
+            return self._frames(*cached)
+        self.misses += 1
+        return self._synthesize(key, text, tts)
+
+    async def _frames(self, data: mmap.mmap, sample_rate: int, channels: int) -> AsyncIterator[rtc.AudioFrame]:
+        sample_bytes = channels * 2
+        step = sample_rate * FRAME_MS // 1000 * sample_bytes
+        for offset in range(HEADER.size, len(data), step):
+            samples = min(step, len(data) - offset) // sample_bytes
+            if not samples:
+                # A truncated file can end in part of a sample
+                return
+            yield rtc.AudioFrame(data[offset:offset + samples * sample_bytes], sample_rate, channels, samples)
+
+    async def _synthesize(self, key: str, text: str, tts) -> AsyncIterator[rtc.AudioFrame]:
+        """Plays TTS output while writing it to the cache; interrupted speech isn't kept."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        temp = f"{path}.{os.getpid()}.tmp"
+        f = None
+        complete = False
+        try:
+            async with tts.synthesize(text) as stream:
+                async for audio in stream:
+                    frame = audio.frame
+                    if f is None:
+                        f = open(temp, "wb")
+                        f.write(HEADER.pack(MAGIC, frame.sample_rate, frame.num_channels))
+                    f.write(frame.data)
+                    yield frame
+            complete = True
+        finally:
+            if f is not None:
+                f.close()
+                if complete:
+                    # Readers only ever map a complete file
+                    os.replace(temp, path)
+                else:
+                    os.remove(temp)
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses, "mapped": len(self._maps)}
+
+
+async def warm(cache: AudioCache, prompts: Iterable[str], tts) -> Tuple[int, int]:
+    """Synthesizes every prompt not cached yet; returns (synthesized, already cached)."""
+    synthesized = cached = 0
+    for text in prompts:
+        if cache.contains(text, tts.sample_rate):
+            cached += 1
+            continue
+        print(f"🔊 {text[:70]}{'...' if len(text) > 70 else ''}")
+        async for _ in cache.speech(text, tts):
+            pass
+        synthesized += 1
+    return synthesized, cached
+
+
+async def main():
+    import aiohttp
+
+    # The agent defines the prompts and voice; imported here to keep it out of the agent's import chain
+    from langgraph_voice_agent import FIXED_PROMPTS, TTS_MODEL, TTS_VOICE, create_tts
+
+    cache = AudioCache(TTS_VOICE, TTS_MODEL)
+    async with aiohttp.ClientSession() as http_session:
+        tts = create_tts(http_session=http_session)
+        try:
+            synthesized, cached = await warm(cache, FIXED_PROMPTS, tts)
+        finally:
+            await tts.aclose()
+    print(f"✅ Audio cache in {cache.directory}: {synthesized} prompts synthesized, {cached} already cached")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
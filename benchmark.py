@@ -0,0 +1,373 @@
+"""Offline benchmarks for caller turns and campaign dialing.
+
+Runs TravelPlanningAgent.process_user_input against a fake Gemini client
+and AgentSession, and a campaign against a stand-in for the LiveKit SIP
+API, so a change can be measured without spending API credits or making
+phone calls:
+
+    python benchmark.py                                   # 1, 100 and 1000 sessions / leads
+    python benchmark.py --levels 1,50 --llm-latency 0.8 --only agent
+
+The agent benchmark runs that many conversations at once (budget, an
+unclear activities answer that needs an LLM extraction, preference, then
+planning) and reports turn latency percentiles and planning-stage wall
+time. The campaign benchmark dials that many leads with as many calls in
+flight and reports calls dialed per second. Each benchmark and level runs
+in its own process, so its peak RSS is its own. All sessions of a level
+share that one process and event loop (the agent worker spreads jobs over
+processes), so high levels also show how the graph code holds up on one
+core and how much the sessions contend for CHECKPOINT_DB.
+
+Fake replies only model time to first audio, not playout, so turn latency
+is the agent's own work plus the simulated LLM and TTS latency.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import redirect_stdout
+from typing import AsyncIterator, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows: peak RSS isn't reported
+    resource = None
+
+DEFAULT_LEVELS = "1,100,1000"
+
+# One conversation; every session gets its own budget so plans aren't shared through the plan cache
+CONVERSATION = (
+    "We have around {budget} dollars",
+    "Something fun, I am not sure yet",
+    "Luxury please",
+)
+FAKE_ACTIVITIES = ["museums", "food tours"]
+FAKE_PLAN = (
+    "Day 1: Arrive, check in and take a walking tour of the old town. Dinner at a local market. "
+    "Day 2: Morning at the national museum, afternoon food tour through the harbour district. "
+    "Day 3: Day trip to the coast, then a farewell dinner with a view of the city."
+)
+
+
+def jittered(seconds: float, jitter: float) -> float:
+    return max(0.0, seconds * random.uniform(1 - jitter, 1 + jitter))
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class FakeLLM:
+    """Stands in for ChatGoogleGenerativeAI and its structured-output slot extractor."""
+
+    def __init__(self, latency: float, jitter: float, chunk_seconds: float,
+                 straggler_rate: float = 0.0, straggler_latency: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_seconds = chunk_seconds
+        # Share of requests that take straggler_latency instead, like an overloaded backend
+        self.straggler_rate = straggler_rate
+        self.straggler_latency = straggler_latency
+        self.calls = 0
+
+    def _latency(self) -> float:
+        if random.random() < self.straggler_rate:
+            return self.straggler_latency
+        return jittered(self.latency, self.jitter)
+
+    async def ainvoke(self, prompt):
+        from langchain_core.messages import AIMessage
+        from langgraph_voice_agent import TravelSlots
+
+        self.calls += 1
+        await asyncio.sleep(self._latency())
+        if "Extract every trip detail" in str(prompt):
+            return TravelSlots(activities=FAKE_ACTIVITIES)
+        return AIMessage(content=FAKE_PLAN)
+
+    async def astream(self, prompt) -> AsyncIterator:
+        from langchain_core.messages import AIMessageChunk
+
+        self.calls += 1
+        await asyncio.sleep(self._latency())
+        words = FAKE_PLAN.split(" ")
+        for i in range(0, len(words), 4):
+            if i:
+                await asyncio.sleep(jittered(self.chunk_seconds, self.jitter))
+            yield AIMessageChunk(content=" ".join(words[i:i + 4]) + " ")
+
+
+class FakeSession:
+    """The parts of AgentSession the agent uses; speech "starts" after the TTS latency."""
+
+    def __init__(self, tts_latency: float, jitter: float):
+        self.tts_latency = tts_latency
+        self.jitter = jitter
+        # No audio is produced, so replies skip the audio cache and keep their modelled TTS latency
+        self.tts = None
+        self._handlers: Dict[str, dict] = {}
+
+    def on(self, event: str, callback):
+        self._handlers.setdefault(event, {})[callback] = None
+
+    def off(self, event: str, callback):
+        self._handlers.get(event, {}).pop(callback, None)
+
+    def _speaking(self):
+        event = type("AgentStateChanged", (), {"new_state": "speaking"})()
+        for callback in list(self._handlers.get("agent_state_changed", {})):
+            callback(event)
+
+    async def generate_reply(self, instructions: str):
+        await asyncio.sleep(jittered(self.tts_latency, self.jitter))
+        self._speaking()
+
+    async def say(self, text):
+        if isinstance(text, str):
+            await self.generate_reply(text)
+            return
+        first = True
+        async for _ in text:
+            if first:
+                await asyncio.sleep(jittered(self.tts_latency, self.jitter))
+                self._speaking()
+                first = False
+
+    def interrupt(self):
+        pass
+
+
+class FakeSIPService:
+    """Answers create_sip_participant after a simulated ring, or fails like an unanswered call."""
+
+    def __init__(self, latency: float, jitter: float, answer_rate: float):
+        self.latency = latency
+        self.jitter = jitter
+        self.answer_rate = answer_rate
+
+    async def create_sip_participant(self, request):
+        await asyncio.sleep(jittered(self.latency, self.jitter))
+        if random.random() >= self.answer_rate:
+            error = Exception("480 Temporarily Unavailable")
+            error.sip_status_code = 480
+            raise error
+        return object()
+
+
+class FakeLiveKitAPI:
+    def __init__(self, sip: FakeSIPService):
+        self.sip = sip
+
+    async def aclose(self):
+        pass
+
+
+async def bench_agent(level: int, args) -> Dict:
+    import langgraph_voice_agent as agent
+
+    llm = FakeLLM(args.llm_latency, args.jitter, args.llm_chunk_seconds, args.llm_straggler_rate,
+                  args.llm_straggler_latency)
+    agent.get_llm = lambda *a, **kw: llm
+    agent.get_slot_extractor = lambda: llm
+    workflow = agent.get_workflow()
+    turns: List[float] = []
+    planning: List[float] = []
+    errors: List[str] = []
+    completed = 0
+    # Like the worker, every session opens its own connection to CHECKPOINT_DB
+    # unless asked to share one
+    shared = await agent.open_checkpointer() if args.shared_checkpointer else None
+
+    async def converse(i: int):
+        nonlocal completed
+        travel_agent = agent.TravelPlanningAgent(workflow, room_name=f"benchmark-{i}")
+        checkpointer = shared
+        try:
+            if checkpointer is None:
+                checkpointer = await agent.open_checkpointer()
+            await travel_agent.start_conversation(checkpointer)
+            session = FakeSession(args.tts_latency, args.jitter)
+            for text in CONVERSATION:
+                started = time.perf_counter()
+                await travel_agent.process_user_input(text.format(budget=1000 + 500 * i), session)
+                turns.append(time.perf_counter() - started)
+            if travel_agent.planning_seconds is not None:
+                planning.append(travel_agent.planning_seconds)
+            completed += travel_agent.travel_state["current_step"] == "complete"
+        except Exception as e:
+            # Reported with the results; one failed session shouldn't hide the others' numbers
+            errors.append(f"{type(e).__name__}: {e}")
+        finally:
+            if checkpointer is not None and checkpointer is not shared:
+                await checkpointer.conn.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(converse(i) for i in range(level)))
+    wall = time.perf_counter() - started
+    if shared is not None:
+        await shared.conn.close()
+    return {
+        "benchmark": "agent",
+        "level": level,
+        "completed": completed,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "turns": len(turns),
+        "llm_calls": llm.calls,
+        "turn_p50_ms": ms(percentile(turns, 0.50)),
+        "turn_p95_ms": ms(percentile(turns, 0.95)),
+        "turn_p99_ms": ms(percentile(turns, 0.99)),
+        "planning_p50_ms": ms(percentile(planning, 0.50)),
+        "planning_p95_ms": ms(percentile(planning, 0.95)),
+        "llm_deadlines": agent.llm_deadlines.stats(),
+        "wall_seconds": round(wall, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def bench_campaign(level: int, args) -> Dict:
+    import campaign_server as server
+    import langgraph_make_call as calls
+    from call_scheduling import CallingWindow, RetryPolicy
+    from lead_ingest import Lead
+
+    calls._shared_livekit_api = FakeLiveKitAPI(FakeSIPService(args.dial_latency, args.jitter, args.answer_rate))
+    # One attempt per lead at any hour, so the campaign ends with its last dial
+    server.retry_policy = RetryPolicy(max_attempts=1)
+    server.calling_window = CallingWindow("")
+    await server.store.start()
+    server.suppression.open()
+    server.suppression.load()
+
+    async def leads() -> AsyncIterator[Lead]:
+        for i in range(level):
+            yield Lead(f"+1555{i:07d}", None, None)
+
+    campaign = server.Campaign(uuid.uuid4().hex, "benchmark", concurrency=level, calls_per_second=0)
+    try:
+        started = time.perf_counter()
+        # make_travel_planning_call prints a few lines per call
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            await campaign.ingest(leads())
+            await campaign._dispatcher
+        wall = time.perf_counter() - started
+    finally:
+        await server.store.close()
+        server.suppression.close()
+    dials = calls.dial_stats["pooled"].snapshot()
+    return {
+        "benchmark": "campaign",
+        "level": level,
+        "dialed": dials["count"],
+        "calls_per_second": round(dials["count"] / wall, 1) if wall else None,
+        "dial_p50_ms": dials["p50_ms"],
+        "dial_p95_ms": dials["p95_ms"],
+        "wall_seconds": round(wall, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+BENCHMARKS = {"agent": bench_agent, "campaign": bench_campaign}
+
+
+def run_one(name: str, level: int, args) -> Dict:
+    """Runs one benchmark level in this process, against throwaway databases."""
+    with tempfile.TemporaryDirectory(prefix="travel-benchmark-") as directory:
+        # Set before the agent and server modules are imported, since they read these at import
+        os.environ["CHECKPOINT_DB"] = os.path.join(directory, "checkpoints.sqlite")
+        os.environ["CAMPAIGN_DB"] = os.path.join(directory, "campaigns.sqlite")
+        os.environ["SUPPRESSION_DB"] = os.path.join(directory, "suppression.sqlite")
+        os.environ["PLAN_CACHE_DB"] = ""
+        os.environ["METRICS_TRACE_DIR"] = ""
+        return asyncio.run(BENCHMARKS[name](level, args))
+
+
+def print_result(result: Dict):
+    if "error" in result:
+        print(f"❌ {result['benchmark']} x{result['level']}: {result['error']}")
+    elif result["benchmark"] == "agent":
+        print(f"🤖 agent    x{result['level']:<5} turns p50/p95/p99 {result['turn_p50_ms']}/{result['turn_p95_ms']}/"
+              f"{result['turn_p99_ms']} ms, planning p50/p95 {result['planning_p50_ms']}/{result['planning_p95_ms']} ms, "
+              f"{result['completed']}/{result['level']} completed, peak RSS {result['peak_rss_mb']} MB")
+        deadlines = result["llm_deadlines"]
+        if deadlines["hedges"] or deadlines["fallbacks"]:
+            print(f"   ⏱️  LLM hedges {deadlines['hedges']} ({deadlines['hedge_wins']} won), "
+                  f"timeouts {deadlines['timeouts']}, fallbacks {deadlines['fallbacks']}")
+        if result["errors"]:
+            print(f"   ⚠️  {result['errors']} sessions failed, e.g. {result['first_error']}")
+    else:
+        print(f"📞 campaign x{result['level']:<5} {result['calls_per_second']} calls/s, dial p50/p95 "
+              f"{result['dial_p50_ms']}/{result['dial_p95_ms']} ms, {result['dialed']} dialed in "
+              f"{result['wall_seconds']}s, peak RSS {result['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline turn and campaign benchmarks")
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help="Concurrent sessions / leads per run")
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), help="Run one benchmark only")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds until the fake LLM answers")
+    parser.add_argument("--llm-chunk-seconds", type=float, default=0.03, help="Seconds between streamed chunks")
+    parser.add_argument("--llm-straggler-rate", type=float, default=0.0,
+                        help="Share of LLM requests that take --llm-straggler-latency instead")
+    parser.add_argument("--llm-straggler-latency", type=float, default=10.0, help="Seconds a straggler takes")
+    parser.add_argument("--tts-latency", type=float, default=0.2, help="Seconds until a reply starts playing")
+    parser.add_argument("--dial-latency", type=float, default=3.0, help="Seconds a fake call rings before it answers")
+    parser.add_argument("--answer-rate", type=float, default=0.8, help="Share of fake calls that are answered")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Latencies vary by up to this fraction either way")
+    parser.add_argument("--shared-checkpointer", action="store_true",
+                        help="Share one checkpoint connection between sessions instead of one each")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    parser.add_argument("--run", choices=sorted(BENCHMARKS), help=argparse.SUPPRESS)
+    parser.add_argument("--level", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Child process: one benchmark level, result on the last line
+        result = run_one(args.run, args.level, args)
+        print(json.dumps(result))
+        return
+
+    names = [args.only] if args.only else list(BENCHMARKS)
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    for name in names:
+        for level in levels:
+            child = subprocess.run(
+                [sys.executable, __file__, *sys.argv[1:], "--run", name, "--level", str(level)],
+                capture_output=True, text=True,
+            )
+            try:
+                result = json.loads(child.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                result = {"benchmark": name, "level": level,
+                          "error": (child.stderr.strip().splitlines() or ["no output"])[-1]}
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print_result(result)
+
+
+if __name__ == "__main__":
+    main()
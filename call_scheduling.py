@@ -0,0 +1,124 @@
+"""When campaign numbers may be dialed (again).
+
+Unanswered, busy and failed numbers are retried with exponential backoff
+(with jitter, so retries from the same burst don't come due together) up to
+CALL_MAX_ATTEMPTS attempts. Every attempt must also fall inside the number's
+calling window: CALL_WINDOW hours (e.g. "09:00-20:00") in the number's own
+timezone, both of which a lead list can override per number.
+"""
+
+import heapq
+import itertools
+import os
+import random
+from datetime import datetime, time as dt_time, timedelta
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from langgraph_make_call import CallResult
+
+CALL_MAX_ATTEMPTS = int(os.getenv("CALL_MAX_ATTEMPTS", "3"))
+CALL_RETRY_BASE_SECONDS = float(os.getenv("CALL_RETRY_BASE_SECONDS", "300"))
+CALL_RETRY_MAX_SECONDS = float(os.getenv("CALL_RETRY_MAX_SECONDS", "3600"))
+# Retry delays vary by up to this fraction either way
+CALL_RETRY_JITTER = 0.2
+# Empty means numbers may be called at any hour
+CALL_WINDOW = os.getenv("CALL_WINDOW", "")
+CALL_WINDOW_TIMEZONE = os.getenv("CALL_WINDOW_TIMEZONE", "UTC")
+
+
+class RetryPolicy:
+    """Decides whether and when a number is dialed again."""
+
+    def __init__(self, max_attempts: int = CALL_MAX_ATTEMPTS, base_seconds: float = CALL_RETRY_BASE_SECONDS,
+                 max_seconds: float = CALL_RETRY_MAX_SECONDS, jitter: float = CALL_RETRY_JITTER):
+        self.max_attempts = max(1, max_attempts)
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.jitter = jitter
+
+    def next_attempt(self, attempts: int, result: CallResult, now: float) -> Optional[float]:
+        """When to try again after `attempts` attempts ending in `result`; None to give up."""
+        if not result.retryable or attempts >= self.max_attempts:
+            return None
+        delay = min(self.max_seconds, self.base_seconds * 2 ** (attempts - 1))
+        return now + delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+@lru_cache(maxsize=256)
+def parse_window(spec: str) -> Optional[Tuple[dt_time, dt_time]]:
+    """"HH:MM-HH:MM" as (start, end); None (no restriction) if empty or invalid."""
+    try:
+        start, end = (datetime.strptime(part.strip(), "%H:%M").time() for part in spec.split("-"))
+    except ValueError:
+        return None
+    return None if start == end else (start, end)
+
+
+@lru_cache(maxsize=256)
+def get_timezone(name: Optional[str]) -> Optional[ZoneInfo]:
+    for candidate in (name, CALL_WINDOW_TIMEZONE):
+        if not candidate:
+            continue
+        try:
+            return ZoneInfo(candidate)
+        except (ValueError, KeyError):
+            # Unknown or malformed name; fall back to the default zone
+            pass
+    return None
+
+
+class CallingWindow:
+    """The hours of the day a number may be called, in its local time."""
+
+    def __init__(self, spec: str = CALL_WINDOW):
+        self.spec = spec
+
+    def next_open(self, now: float, timezone: Optional[str] = None, spec: Optional[str] = None) -> float:
+        """`now` if the number may be called now, else when its window next opens.
+
+        `timezone` and `spec` override the default zone and hours for one number.
+        """
+        window = parse_window(spec or self.spec)
+        if window is None:
+            return now
+        start, end = window
+        local = datetime.fromtimestamp(now, get_timezone(timezone))
+        current = local.time()
+        if start < end:
+            if start <= current < end:
+                return now
+            day = local if current < start else local + timedelta(days=1)
+        else:
+            # Overnight window, e.g. 18:00-02:00
+            if current >= start or current < end:
+                return now
+            day = local
+        opens = datetime.combine(day.date(), start, tzinfo=local.tzinfo)
+        return opens.timestamp()
+
+
+class RetryScheduler:
+    """Numbers waiting for a later attempt, in a heap ordered by due time."""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str]] = []
+        # Breaks ties so numbers due at the same time keep their order
+        self._order = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, due: float, phone: str):
+        heapq.heappush(self._heap, (due, next(self._order), phone))
+
+    def next_due(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> Optional[Tuple[float, str]]:
+        """(due time, number) of the earliest number due by `now`, if any."""
+        if self._heap and self._heap[0][0] <= now:
+            due, _, phone = heapq.heappop(self._heap)
+            return due, phone
+        return None
@@ -0,0 +1,141 @@
+"""Push updates for campaign dashboards over Server-Sent Events.
+
+Each campaign has one CampaignEvents source. Number transitions are
+published to it as they happen and an aggregate snapshot is taken every
+CAMPAIGN_EVENTS_SNAPSHOT_SECONDS while anyone is listening; both are fanned
+out to every subscriber.
+
+Publishing never waits on a client. Each subscriber keeps only the latest
+status per changed number until its connection is ready for more; a client
+so far behind that more than CAMPAIGN_EVENTS_MAX_PENDING numbers are waiting
+is sent a "reset" instead and reloads the page it shows.
+"""
+
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+CAMPAIGN_EVENTS_SNAPSHOT_SECONDS = float(os.getenv("CAMPAIGN_EVENTS_SNAPSHOT_SECONDS", "2"))
+# Transitions are sent in batches at most this often per client
+CAMPAIGN_EVENTS_BATCH_SECONDS = float(os.getenv("CAMPAIGN_EVENTS_BATCH_SECONDS", "0.25"))
+CAMPAIGN_EVENTS_MAX_PENDING = int(os.getenv("CAMPAIGN_EVENTS_MAX_PENDING", "5000"))
+
+# Reconnect delay suggested to EventSource clients, in milliseconds
+RETRY_MS = 2000
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscriber:
+    """One connected client: the changes and snapshot it hasn't been sent yet."""
+
+    def __init__(self, max_pending: int = CAMPAIGN_EVENTS_MAX_PENDING,
+                 batch_seconds: float = CAMPAIGN_EVENTS_BATCH_SECONDS):
+        self.max_pending = max_pending
+        self.batch_seconds = batch_seconds
+        self.changes: Dict[str, str] = {}
+        self.version = None
+        self.snapshot: Optional[str] = None
+        self.overflowed = False
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def push(self, phone: str, status: str, version):
+        if self.overflowed:
+            return
+        # Coalesced: a client only needs each number's latest status
+        self.changes[phone] = status
+        self.version = version
+        if len(self.changes) > self.max_pending:
+            self.reset()
+        self._ready.set()
+
+    def reset(self):
+        self.dropped += len(self.changes)
+        self.changes = {}
+        self.overflowed = True
+        self._ready.set()
+
+    def offer_snapshot(self, data: str):
+        # Only the latest snapshot matters; an unsent older one is replaced
+        self.snapshot = data
+        self._ready.set()
+
+    async def events(self) -> AsyncIterator[str]:
+        """SSE messages for this client; each waits until the last one was sent."""
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self.overflowed:
+                self.overflowed = False
+                yield sse("reset", {})
+            if self.changes:
+                changes, self.changes = self.changes, {}
+                yield sse("changes", {"version": self.version, "changes": list(changes.items())})
+            if self.snapshot is not None:
+                snapshot, self.snapshot = self.snapshot, None
+                yield snapshot
+            # Let further transitions collect into the next batch
+            await asyncio.sleep(self.batch_seconds)
+
+
+class CampaignEvents:
+    """Fans one campaign's transitions and snapshots out to its subscribers.
+
+    `poll` returns the aggregate snapshot; it is called once per interval no
+    matter how many clients are connected, and only while any are.
+    """
+
+    def __init__(self, poll: Callable[[], Awaitable[Dict]],
+                 snapshot_seconds: float = CAMPAIGN_EVENTS_SNAPSHOT_SECONDS):
+        self.poll = poll
+        self.snapshot_seconds = snapshot_seconds
+        self.subscribers: Set[Subscriber] = set()
+        self._poller: Optional[asyncio.Task] = None
+
+    def publish(self, phone: str, status: str, version):
+        for subscriber in self.subscribers:
+            subscriber.push(phone, status, version)
+
+    def reset(self):
+        """Tells every subscriber to reload; used when changes were missed."""
+        for subscriber in self.subscribers:
+            subscriber.reset()
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll_loop())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+
+    async def stream(self) -> AsyncIterator[str]:
+        subscriber = self.subscribe()
+        try:
+            async for message in subscriber.events():
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                snapshot = await self.poll()
+            except Exception as e:
+                print(f"⚠️  Campaign snapshot failed: {e}")
+            else:
+                # Encoded once, shared by every subscriber
+                data = sse("snapshot", snapshot)
+                for subscriber in self.subscribers:
+                    subscriber.offer_snapshot(data)
+            await asyncio.sleep(self.snapshot_seconds)
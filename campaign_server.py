@@ -1,17 +1,54 @@
 import asyncio
-import csv
-import io
-from typing import List, Optional
+import os
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from itertools import islice
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
 
 # top-level imports and app setup
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
-from langgraph_make_call import make_travel_planning_call
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from langgraph_make_call import (
+    CONNECTED,
+    DIAL_ERROR,
+    CallResult,
+    close_livekit_api,
+    get_dial_stats,
+    make_travel_planning_call,
+    start_livekit_api,
+)
+from call_scheduling import CallingWindow, RetryPolicy, RetryScheduler
+from campaign_events import CampaignEvents
+from campaign_store import CampaignStore
+from dialer_worker import TokenBucket
+from latency_metrics import METRICS_CONTENT_TYPE, observe, render_metrics
+from lead_ingest import Lead, LeadReader
+from suppression import SUPPRESS_CALLED, SuppressionList
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await store.start()
+    suppression.open()
+    suppression.load()
+    # One pooled LiveKit client for every call this server dials
+    await start_livekit_api()
+    resume_campaigns()
+    try:
+        yield
+    finally:
+        for campaign in campaigns.values():
+            campaign.stop()
+        await close_livekit_api()
+        await store.close()
+        suppression.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow Next.js dev server to call the API
 app.add_middleware(
@@ -22,86 +59,450 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-campaign_state = {
-    "total": 0,
-    "pending": [],  # type: List[str]
-    "in_progress": None,  # type: Optional[str]
-    "completed": [],  # type: List[str]
-    "failed": [],  # type: List[str]
-    "running": False,
-}
-
-
-def normalize_phone(n: str) -> str:
-    n = n.strip()
-    if not n:
-        return n
-    return n if n.startswith("+") else "+" + n
-
-
-def extract_phone_numbers(file_bytes: bytes) -> List[str]:
-    text = file_bytes.decode("utf-8", errors="ignore")
-    stream = io.StringIO(text)
-
-    # Try DictReader for header-based CSV first
-    stream.seek(0)
-    dr = csv.DictReader(stream)
-    numbers: List[str] = []
-
-    if dr.fieldnames:
-        candidates = [fn for fn in dr.fieldnames if fn and fn.lower() in {"phone", "phone_number", "phone number", "number"}]
-        if candidates:
-            col = candidates[0]
-            for row in dr:
-                val = (row.get(col) or "").strip()
-                if val:
-                    numbers.append(normalize_phone(val))
-    
-    # Fallback: treat first column as phone if header not found
-    if not numbers:
-        stream.seek(0)
-        rr = csv.reader(stream)
-        for i, row in enumerate(rr):
-            if not row:
+# Dialer tuning: how many calls may be in flight at once and how many new
+# calls may start per second. The defaults match the old one-at-a-time
+# behaviour (one call roughly every 3 seconds).
+CAMPAIGN_CONCURRENCY = int(os.getenv("CAMPAIGN_CONCURRENCY", "1"))
+CAMPAIGN_CALLS_PER_SECOND = float(os.getenv("CAMPAIGN_CALLS_PER_SECOND", "0.33"))
+
+# "local" dials from this process; "workers" only queues numbers in the store
+# for standalone dialer workers (dialer_worker.py) to claim
+CAMPAIGN_DIALER = os.getenv("CAMPAIGN_DIALER", "local")
+
+# /status pages through a campaign's numbers and reports changes since the
+# client's last version; clients further behind than the change log get a
+# fresh page instead
+STATUS_PAGE_SIZE = int(os.getenv("STATUS_PAGE_SIZE", "500"))
+STATUS_CHANGE_LOG_SIZE = int(os.getenv("STATUS_CHANGE_LOG_SIZE", "10000"))
+# Versions of campaigns read from the store are timestamps written by
+# several processes; changes are re-sent for this many seconds of clock skew
+STATUS_CURSOR_OVERLAP = 2.0
+
+CALL_STATUSES = ("pending", "in_progress", "completed", "failed")
+
+# Campaigns and call records survive restarts in the campaign store
+store = CampaignStore()
+
+# Numbers never to be called; uploads are checked against it
+suppression = SuppressionList()
+
+# When failed numbers are retried and at what hours numbers may be called
+retry_policy = RetryPolicy()
+calling_window = CallingWindow()
+
+# Campaigns loaded in this process, in creation order
+campaigns: Dict[str, "Campaign"] = {}
+
+# Event sources for campaigns followed through the store, while anyone listens
+store_feeds: Dict[str, CampaignEvents] = {}
+
+
+class Campaign:
+    """One uploaded lead list: its queue of numbers, progress and dial loop.
+
+    Every number's status is kept in an index with running counts per
+    status, plus a bounded log of recent changes so clients can poll for
+    just what changed since the version they last saw.
+
+    Fresh numbers are dialed in upload order. Numbers to be retried, or
+    that came up outside their calling window, wait in a heap by due time
+    and take precedence over fresh numbers once due, so retries are spread
+    through the campaign instead of piling up at the end.
+    """
+
+    def __init__(self, campaign_id: str, name: str, concurrency: int = CAMPAIGN_CONCURRENCY,
+                 calls_per_second: float = CAMPAIGN_CALLS_PER_SECOND, created_at: Optional[float] = None):
+        self.id = campaign_id
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.calls_per_second = calls_per_second
+        self.created_at = created_at or time.time()
+        self.total = 0
+        self.numbers = []  # type: List[str]
+        self.states = {}  # type: Dict[str, str]
+        self.counts = dict.fromkeys(CALL_STATUSES, 0)
+        self.pending = deque()  # type: deque
+        # When each pending number was queued, for the queue wait histogram
+        self.pending_since = deque()  # type: deque
+        self.scheduled = RetryScheduler()
+        self.in_progress = set()  # type: Set[str]
+        self.attempts = {}  # type: Dict[str, int]
+        # Latest outcome per dialed number, and how many numbers are at each
+        self.outcomes = {}  # type: Dict[str, str]
+        self.outcome_counts = {}  # type: Dict[str, int]
+        # Per-number (timezone, calling window) from the lead list, where given
+        self.rules = {}  # type: Dict[str, Tuple[Optional[str], Optional[str]]]
+        # Versions count up from the clock in microseconds, so a cursor from
+        # before a restart never matches a version handed out after it
+        self.version = int(time.time() * 1_000_000)
+        self.changes = deque(maxlen=STATUS_CHANGE_LOG_SIZE)  # type: deque
+        self.running = False
+        self.reading = False
+        self.events = CampaignEvents(self._snapshot)
+        self._arrived = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @classmethod
+    def restore(cls, row: Dict) -> "Campaign":
+        """Rebuilds a campaign from the store; numbers that were mid-dial are queued again."""
+        campaign = cls(row["id"], row["name"], row["concurrency"], row["calls_per_second"], row["created_at"])
+        campaign.running = row["status"] != "finished"
+        for phone, status, attempts, outcome, next_attempt_at, timezone, window in store.load_calls(campaign.id):
+            campaign.total += 1
+            campaign.numbers.append(phone)
+            if timezone or window:
+                campaign.rules[phone] = (timezone, window)
+            if attempts:
+                campaign.attempts[phone] = attempts
+            if outcome:
+                campaign._record_outcome(phone, outcome)
+            if status in ("completed", "failed"):
+                campaign._set(phone, status)
                 continue
-            # Skip header-like first row if it contains non-digit content
-            if i == 0 and any(ch.isalpha() for ch in ",".join(row)):
+            campaign._set(phone, "pending")
+            if next_attempt_at:
+                campaign.scheduled.push(next_attempt_at, phone)
+            else:
+                campaign.pending.append(phone)
+                campaign.pending_since.append(time.time())
+        campaign.changes.clear()
+        return campaign
+
+    def _set(self, phone: str, status: str):
+        old = self.states.get(phone)
+        if old is not None:
+            self.counts[old] -= 1
+        self.states[phone] = status
+        self.counts[status] += 1
+        if status == "in_progress":
+            self.in_progress.add(phone)
+        else:
+            self.in_progress.discard(phone)
+        self.version += 1
+        self.changes.append((phone, status))
+        self.events.publish(phone, status, self.version)
+
+    def _record_outcome(self, phone: str, outcome: str):
+        old = self.outcomes.get(phone)
+        if old is not None:
+            self.outcome_counts[old] -= 1
+        self.outcomes[phone] = outcome
+        self.outcome_counts[outcome] = self.outcome_counts.get(outcome, 0) + 1
+
+    def changes_since(self, version: int) -> Optional[List[List[str]]]:
+        """Latest [phone, status] of each number changed after `version`.
+
+        None if `version` is older than the change log (or not from this
+        campaign's lifetime), in which case the client has to reload.
+        """
+        behind = self.version - version
+        if behind < 0 or behind > len(self.changes):
+            return None
+        recent = islice(self.changes, len(self.changes) - behind, None)
+        return [[phone, status] for phone, status in dict(recent).items()]
+
+    def status(self, since: Optional[float] = None, offset: int = 0, limit: int = STATUS_PAGE_SIZE) -> Dict:
+        """Counts plus either the changes since `since` or a page of numbers."""
+        changes = None if since is None else self.changes_since(int(since))
+        page = None
+        if changes is None:
+            page = [[phone, self.states[phone]] for phone in self.numbers[offset:offset + limit]]
+        return status_response(
+            self, self.counts, self.outcome_counts, sorted(self.in_progress), self.version,
+            since, changes, offset, limit, page,
+        )
+
+    async def _snapshot(self) -> Dict:
+        body = self.status(since=self.version)
+        del body["changes"]
+        return body
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "created_at": self.created_at,
+            "total": self.total,
+            **self.counts,
+            "outcomes": dict(self.outcome_counts),
+            "running": self.running,
+        }
+
+    def save(self):
+        status = "ingesting" if self.reading else "running" if self.running else "finished"
+        store.save_campaign(
+            self.id, self.name, status, self.total,
+            self.concurrency, self.calls_per_second, self.created_at,
+        )
+
+    def start(self):
+        """Starts dialing whatever is (or will be) queued."""
+        self.running = True
+        self.save()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    def stop(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+
+    async def ingest(self, leads: AsyncIterable[Lead]):
+        """Queues numbers for the dialer as they are read.
+
+        Dialing starts with the first number; this returns once `leads`
+        is exhausted, while the dial loop keeps working through the rest.
+        """
+        self.reading = True
+        if CAMPAIGN_DIALER == "local":
+            self.start()
+        else:
+            # Dialer workers pick the numbers up from the store
+            self.running = True
+            self.save()
+        try:
+            async for n, timezone, window in leads:
+                self.total += 1
+                self.numbers.append(n)
+                if timezone or window:
+                    self.rules[n] = (timezone, window)
+                self._set(n, "pending")
+                self.pending.append(n)
+                self.pending_since.append(time.time())
+                store.add_call(self.id, n, self.total, timezone, window)
+                self._arrived.set()
+        finally:
+            self.reading = False
+            self._arrived.set()
+            self.save()
+
+    async def _dial(self, n: str, slots: asyncio.Semaphore):
+        try:
+            try:
+                # Initiate outbound call via LiveKit to this number
+                result = await make_travel_planning_call(n)
+            except Exception as e:
+                # Failed dials come back as outcomes; anything raised is unexpected
+                result = CallResult(DIAL_ERROR, True, str(e))
+            retry_at = None
+            if result.outcome == CONNECTED:
+                status = "completed"
+                if SUPPRESS_CALLED:
+                    await suppression.add_called(n, f"campaign {self.id}")
+            else:
+                retry_at = retry_policy.next_attempt(self.attempts[n], result, time.time())
+                status = "failed" if retry_at is None else "pending"
+            self._record_outcome(n, result.outcome)
+            self._set(n, status)
+            if retry_at is not None:
+                self.scheduled.push(retry_at, n)
+            store.update_call(self.id, n, status, outcome=result.outcome, next_attempt_at=retry_at)
+        except Exception as e:
+            # Reported rather than raised, so one bad write doesn't stop the campaign
+            print(f"⚠️  Could not record the call to {n}: {e}")
+        finally:
+            # Even when recording failed, so the slot isn't lost to the campaign
+            slots.release()
+            # The dial loop may be waiting to see whether anything else is left to do
+            self._arrived.set()
+
+    async def _next_number(self) -> Optional[Tuple[str, float]]:
+        """The next number to dial and since when it was due, waiting until one is; None once all are done."""
+        while True:
+            now = time.time()
+            item = self.scheduled.pop_due(now)
+            if item is None and self.pending:
+                item = (self.pending_since.popleft(), self.pending.popleft())
+            if item is not None:
+                due, n = item
+                timezone, window = self.rules.get(n, (None, None))
+                opens = calling_window.next_open(now, timezone, window)
+                if opens <= now:
+                    return n, due
+                self.scheduled.push(opens, n)
+                store.update_call(self.id, n, "pending", next_attempt_at=opens)
                 continue
-            numbers.append(normalize_phone(row[0]))
-
-    # Filter out empties and deduplicate while preserving order
-    seen = set()
-    result: List[str] = []
-    for n in numbers:
-        if n and n not in seen:
-            seen.add(n)
-            result.append(n)
-    return result
-
-
-async def run_campaign(numbers: List[str]):
-    campaign_state["running"] = True
-    campaign_state["pending"] = numbers.copy()
-    campaign_state["total"] = len(numbers)
-    campaign_state["completed"] = []
-    campaign_state["failed"] = []
-
-    for n in numbers:
-        campaign_state["in_progress"] = n
+            if not (self.reading or self.in_progress or len(self.scheduled)):
+                return None
+            # Wait for new numbers, a call to finish, or the next scheduled number
+            due = self.scheduled.next_due()
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), None if due is None else max(0.0, due - now))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch(self):
+        bucket = TokenBucket(self.calls_per_second)
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        try:
+            while True:
+                # Wait for a free call slot, a number that is due, then the rate limiter
+                await slots.acquire()
+                item = await self._next_number()
+                if item is None:
+                    slots.release()
+                    break
+                n, due = item
+                await bucket.acquire()
+                observe("queue_wait", max(0.0, time.time() - due), dialer="local")
+                self.attempts[n] = self.attempts.get(n, 0) + 1
+                self._set(n, "in_progress")
+                store.update_call(self.id, n, "in_progress", add_attempt=True)
+                task = asyncio.create_task(self._dial(n, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+            self.running = False
+            self.save()
+        except asyncio.CancelledError:
+            # Shutting down: calls still in flight stay "in_progress" and are redialed on restart
+            for task in tasks:
+                task.cancel()
+            raise
+
+
+def resume_campaigns():
+    """Restarts every campaign that hadn't finished when the server stopped."""
+    for row in store.unfinished_campaigns():
+        campaign = Campaign.restore(row)
+        if CAMPAIGN_DIALER == "local":
+            campaigns[campaign.id] = campaign
+            campaign.start()
+        elif row["status"] == "ingesting":
+            # The upload was cut off; let the workers finish what was stored
+            campaign.save()
+
+
+async def _prepend(first: str, rest: AsyncIterator[str]) -> AsyncIterator[str]:
+    yield first
+    async for n in rest:
+        yield n
+
+
+def status_response(campaign, counts: Dict[str, int], outcomes: Dict[str, int], in_progress: List[str], version,
+                    since: Optional[float], changes: Optional[List], offset: int, limit: int,
+                    page: Optional[List]) -> Dict:
+    """Body of the status endpoints.
+
+    `version` is an opaque cursor to pass back as `since`. With a cursor
+    the body carries `changes`; without one, or when the cursor is too
+    old ("reset"), it carries a `page` of numbers to render from scratch.
+    """
+    body = {
+        "id": campaign.id,
+        "name": campaign.name,
+        "total": campaign.total,
+        "running": campaign.running,
+        "counts": {key: counts.get(key, 0) for key in CALL_STATUSES},
+        # Latest outcome per dialed number: connected, no_answer, busy, dial_error
+        "outcomes": dict(outcomes),
+        "in_progress": in_progress,
+        "version": version,
+    }
+    if changes is not None:
+        body["changes"] = changes
+    else:
+        body["reset"] = since is not None
+        body["page"] = {"offset": offset, "limit": limit, "items": page}
+    return body
+
+
+def stored_status(row: Dict, since: Optional[float], offset: int, limit: int) -> Dict:
+    """Status of a campaign read from the store, e.g. one dialed by workers."""
+    campaign = Campaign(row["id"], row["name"], row["concurrency"], row["calls_per_second"], row["created_at"])
+    campaign.total = row["total"]
+    campaign.running = row["status"] != "finished"
+    # Anything written from here on is newer than this version
+    version = time.time()
+    changes = page = None
+    if since is not None:
+        changes = store.changed_calls(campaign.id, since - STATUS_CURSOR_OVERLAP, STATUS_CHANGE_LOG_SIZE + 1)
+        if len(changes) > STATUS_CHANGE_LOG_SIZE:
+            changes = None
+        else:
+            changes = [[phone, status] for phone, status in dict(changes).items()]
+    if changes is None:
+        page = [list(item) for item in store.call_page(campaign.id, offset, limit)]
+    in_progress = store.calls_with_status(campaign.id, "in_progress", STATUS_PAGE_SIZE)
+    return status_response(
+        campaign, store.call_counts(campaign.id), store.outcome_counts(campaign.id), in_progress, version,
+        since, changes, offset, limit, page,
+    )
+
+
+async def campaign_status_view(campaign_id: str, since: Optional[float], offset: int, limit: int) -> Dict:
+    """Status of a campaign dialed by this process, or from its record in the store."""
+    campaign = campaigns.get(campaign_id)
+    if campaign is not None and CAMPAIGN_DIALER == "local":
+        return campaign.status(since, offset, limit)
+    # Dialer workers write to the store directly; include our queued writes too
+    await store.flush()
+    row = store.get_campaign(campaign_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return stored_status(row, since, offset, limit)
+
+
+def store_feed(campaign_id: str) -> CampaignEvents:
+    """Shared event source for a campaign followed through the store.
+
+    Workers update the store directly, so one poll per snapshot interval
+    picks up the numbers changed since the previous poll and publishes them
+    to every subscriber.
+    """
+    feed = store_feeds.get(campaign_id)
+    if feed is not None:
+        return feed
+    cursor = time.time()
+    # Polls overlap to allow for clock skew; what the last one sent isn't repeated
+    sent: Dict[str, str] = {}
+
+    async def poll() -> Dict:
+        nonlocal cursor, sent
+        await store.flush()
+        row = store.get_campaign(campaign_id)
+        body = stored_status(row, cursor, 0, 0)
+        cursor = body["version"]
+        if "changes" in body:
+            changes = dict(body.pop("changes"))
+            for phone, status in changes.items():
+                if sent.get(phone) != status:
+                    feed.publish(phone, status, cursor)
+            sent = changes
+        else:
+            feed.reset()
+            sent = {}
+            del body["reset"], body["page"]
+        return body
+
+    feed = store_feeds[campaign_id] = CampaignEvents(poll)
+    return feed
+
+
+async def campaign_events_response(campaign_id: str) -> StreamingResponse:
+    campaign = campaigns.get(campaign_id)
+    if campaign is not None and CAMPAIGN_DIALER == "local":
+        events = campaign.events
+    else:
+        if store.get_campaign(campaign_id) is None:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+        events = store_feed(campaign_id)
+
+    async def stream() -> AsyncIterator[str]:
         try:
-            # Initiate outbound call via LiveKit to this number
-            await make_travel_planning_call(n)
-            campaign_state["completed"].append(n)
-        except Exception:
-            campaign_state["failed"].append(n)
+            async for message in events.stream():
+                yield message
         finally:
-            # Remove from pending
-            if campaign_state["pending"] and campaign_state["pending"][0] == n:
-                campaign_state["pending"].pop(0)
-            # Small delay between calls to avoid rapid-fire dialing
-            await asyncio.sleep(3)
-    campaign_state["in_progress"] = None
-    campaign_state["running"] = False
+            if not events.subscribers and store_feeds.get(campaign_id) is events:
+                del store_feeds[campaign_id]
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # Keep reverse proxies from buffering the stream
+        "X-Accel-Buffering": "no",
+    })
 
 
 # index() route
@@ -111,22 +512,159 @@ async def index():
 
 
 @app.post("/upload")
-async def upload_csv(file: UploadFile = File(...)):
-    if not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only .csv files are supported")
-    content = await file.read()
-    numbers = extract_phone_numbers(content)
-    if not numbers:
+async def upload_csv(
+    file: UploadFile = File(...),
+    concurrency: Optional[int] = None,
+    calls_per_second: Optional[float] = None,
+):
+    if not file.filename.lower().endswith((".csv", ".csv.gz", ".gz")):
+        raise HTTPException(status_code=400, detail="Only .csv or gzipped .csv files are supported")
+
+    # The file is parsed in chunks; dialing starts as soon as the first number is read.
+    # Numbers on the suppression list (including any added by dialer workers) are dropped.
+    suppression.refresh()
+    reader = LeadReader(file, suppression=suppression)
+    numbers = reader.__aiter__()
+    try:
+        first = await numbers.__anext__()
+    except StopAsyncIteration:
+        if reader.suppressed:
+            raise HTTPException(status_code=400, detail="Every number in the CSV is suppressed")
         raise HTTPException(status_code=400, detail="No phone numbers found in CSV")
 
-    # Run sequential campaign in background
-    asyncio.create_task(run_campaign(numbers))
-    return JSONResponse({"message": "Campaign started", "total": len(numbers)})
+    # Optionally override dialer settings per campaign
+    campaign = Campaign(
+        uuid.uuid4().hex,
+        file.filename,
+        concurrency=concurrency or CAMPAIGN_CONCURRENCY,
+        calls_per_second=CAMPAIGN_CALLS_PER_SECOND if calls_per_second is None else calls_per_second,
+    )
+    campaigns[campaign.id] = campaign
+    # The upload file is only open for this request, so it is read to the end before responding
+    await campaign.ingest(_prepend(first, numbers))
+    return JSONResponse({
+        "message": "Campaign started",
+        "campaign_id": campaign.id,
+        "total": campaign.total,
+        **reader.stats(),
+    })
+
+
+@app.post("/suppression/import")
+async def import_suppression(file: UploadFile = File(...), reason: str = "import"):
+    """Adds every number in a CSV (same format as /upload) to the suppression list."""
+    if not file.filename.lower().endswith((".csv", ".csv.gz", ".gz")):
+        raise HTTPException(status_code=400, detail="Only .csv or gzipped .csv files are supported")
+    reader = LeadReader(file)
+    added, existing = await suppression.import_numbers((lead.phone async for lead in reader), reason)
+    return JSONResponse({"added": added, "already_suppressed": existing, **reader.stats()})
+
+
+@app.get("/suppression/export")
+async def export_suppression():
+    async def rows() -> AsyncIterator[str]:
+        yield "phone,reason,added_at\n"
+        batch = []
+        for phone, reason, added_at in suppression.export_rows():
+            batch.append(f"{phone},{reason or ''},{added_at:.0f}\n")
+            if len(batch) >= 10000:
+                yield "".join(batch)
+                batch = []
+                await asyncio.sleep(0)
+        yield "".join(batch)
+
+    return StreamingResponse(rows(), media_type="text/csv", headers={
+        "Content-Disposition": 'attachment; filename="suppression.csv"',
+    })
+
+
+@app.get("/suppression")
+async def suppression_stats():
+    return JSONResponse(suppression.stats())
+
+
+@app.get("/campaigns")
+async def list_campaigns():
+    local = campaigns if CAMPAIGN_DIALER == "local" else {}
+    summaries = [campaign.summary() for campaign in local.values()]
+    # Campaigns from earlier runs of the server, or dialed by workers
+    await store.flush()
+    for row in store.list_campaigns():
+        if row["id"] in local:
+            continue
+        counts = store.call_counts(row["id"])
+        summaries.append({
+            "id": row["id"],
+            "name": row["name"],
+            "created_at": row["created_at"],
+            "total": row["total"],
+            **{key: counts.get(key, 0) for key in CALL_STATUSES},
+            "outcomes": store.outcome_counts(row["id"]),
+            "running": row["status"] != "finished",
+        })
+    summaries.sort(key=lambda summary: summary["created_at"])
+    return JSONResponse(summaries)
+
+
+@app.get("/campaigns/{campaign_id}/status")
+async def campaign_status(
+    campaign_id: str,
+    since: Optional[float] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(STATUS_PAGE_SIZE, ge=0, le=STATUS_CHANGE_LOG_SIZE),
+):
+    return JSONResponse(await campaign_status_view(campaign_id, since, offset, limit))
+
+
+@app.get("/campaigns/{campaign_id}/events")
+async def campaign_events(campaign_id: str):
+    """Server-Sent Events: "changes" as numbers move, "snapshot" every few seconds."""
+    return await campaign_events_response(campaign_id)
+
+
+@app.get("/events")
+async def events():
+    # Most recently started campaign, for the dashboard
+    await store.flush()
+    rows = store.list_campaigns()
+    if not rows:
+        # 204 tells EventSource not to reconnect; the dashboard retries later
+        return Response(status_code=204)
+    return await campaign_events_response(rows[-1]["id"])
 
 
 @app.get("/status")
-async def status():
-    return JSONResponse(campaign_state)
+async def status(
+    since: Optional[float] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(STATUS_PAGE_SIZE, ge=0, le=STATUS_CHANGE_LOG_SIZE),
+):
+    # Most recently started campaign, for the dashboard
+    await store.flush()
+    rows = store.list_campaigns()
+    if not rows:
+        return JSONResponse({
+            "total": 0,
+            "running": False,
+            "counts": dict.fromkeys(CALL_STATUSES, 0),
+            "outcomes": {},
+            "in_progress": [],
+            "version": 0,
+            "reset": since is not None,
+            "page": {"offset": offset, "limit": limit, "items": []},
+        })
+    return JSONResponse(await campaign_status_view(rows[-1]["id"], since, offset, limit))
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Per-stage latency histograms (dials, queue wait) in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/dial-stats")
+async def dial_stats():
+    return JSONResponse(get_dial_stats())
 
 
 # Mount static assets under /frontend
@@ -0,0 +1,397 @@
+"""Durable storage for campaigns and their per-number call records.
+
+Everything lives in one SQLite file (CAMPAIGN_DB, WAL mode). The dialer
+never waits on disk: writes are queued in memory, coalesced per number and
+flushed in a single transaction every CAMPAIGN_DB_FLUSH_SECONDS, or sooner
+once CAMPAIGN_DB_BATCH_SIZE changes are queued.
+
+Standalone dialer workers (dialer_worker.py) share the same file. They
+claim numbers with time-limited leases that they keep renewing; numbers
+whose lease runs out (e.g. the worker crashed) are claimed again by others.
+
+A number waiting for a retry is "pending" with a next_attempt_at time; it
+is not dialed before then.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+CAMPAIGN_DB = os.getenv("CAMPAIGN_DB", "campaigns.sqlite")
+CAMPAIGN_DB_FLUSH_SECONDS = float(os.getenv("CAMPAIGN_DB_FLUSH_SECONDS", "0.5"))
+CAMPAIGN_DB_BATCH_SIZE = int(os.getenv("CAMPAIGN_DB_BATCH_SIZE", "5000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    concurrency INTEGER NOT NULL,
+    calls_per_second REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calls (
+    campaign_id TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    outcome TEXT,
+    next_attempt_at REAL,
+    timezone TEXT,
+    call_window TEXT,
+    PRIMARY KEY (campaign_id, phone)
+);
+CREATE INDEX IF NOT EXISTS calls_by_status ON calls (campaign_id, status, seq);
+"""
+
+# Columns added after the first release, for stores created before them
+MIGRATIONS = {
+    "calls": [
+        ("lease_owner", "TEXT"), ("lease_expires", "REAL"),
+        ("outcome", "TEXT"), ("next_attempt_at", "REAL"), ("timezone", "TEXT"), ("call_window", "TEXT"),
+    ],
+}
+LEASE_INDEX = "CREATE INDEX IF NOT EXISTS calls_by_lease ON calls (status, lease_expires)"
+CHANGES_INDEX = "CREATE INDEX IF NOT EXISTS calls_by_update ON calls (campaign_id, updated_at)"
+
+
+class CampaignStore:
+    """SQLite-backed campaign store with batched, write-behind updates."""
+
+    def __init__(self, path: str = CAMPAIGN_DB, flush_interval: float = CAMPAIGN_DB_FLUSH_SECONDS,
+                 batch_size: int = CAMPAIGN_DB_BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._db: Optional[sqlite3.Connection] = None
+        self._campaigns: Dict[str, tuple] = {}
+        self._new_calls: List[tuple] = []
+        # (campaign_id, phone) -> (status, attempts to add, outcome, next_attempt_at, updated_at)
+        self._call_updates: Dict[Tuple[str, str], tuple] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        # A cancelled flush leaves its write running in the worker thread;
+        # the next one must wait for it rather than interleave
+        self._write_lock = threading.Lock()
+        self._claim_round = 0
+        self.flushes = 0
+
+    def open(self):
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        for table, columns in MIGRATIONS.items():
+            existing = {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}
+            for column, kind in columns:
+                if column not in existing:
+                    self._db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+        self._db.execute(LEASE_INDEX)
+        self._db.execute(CHANGES_INDEX)
+
+    async def start(self):
+        """Opens the database and starts the background flusher."""
+        if self._db is None:
+            self.open()
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._campaigns) + len(self._new_calls) + len(self._call_updates)
+
+    def _queued_change(self):
+        if self._wake is not None and self.queued >= self.batch_size:
+            self._wake.set()
+
+    # -- writes (queued) ----------------------------------------------------
+
+    def save_campaign(self, campaign_id: str, name: str, status: str, total: int,
+                      concurrency: int, calls_per_second: float, created_at: float):
+        self._campaigns[campaign_id] = (
+            campaign_id, name, status, total, concurrency, calls_per_second, created_at, time.time(),
+        )
+        self._queued_change()
+
+    def add_call(self, campaign_id: str, phone: str, seq: int,
+                 timezone: Optional[str] = None, window: Optional[str] = None):
+        self._new_calls.append((campaign_id, phone, seq, time.time(), timezone, window))
+        self._queued_change()
+
+    def update_call(self, campaign_id: str, phone: str, status: str, add_attempt: bool = False,
+                    outcome: Optional[str] = None, next_attempt_at: Optional[float] = None):
+        key = (campaign_id, phone)
+        queued = self._call_updates.get(key)
+        attempts = int(add_attempt) + (queued[1] if queued else 0)
+        # An update without an outcome keeps the last one recorded
+        if outcome is None and queued:
+            outcome = queued[2]
+        self._call_updates[key] = (status, attempts, outcome, next_attempt_at, time.time())
+        self._queued_change()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except sqlite3.Error:
+                # Changes were requeued; try again on the next tick
+                pass
+
+    async def flush(self):
+        """Writes every queued change in one transaction."""
+        if not self.queued or self._db is None:
+            return
+        campaigns, self._campaigns = list(self._campaigns.values()), {}
+        new_calls, self._new_calls = self._new_calls, []
+        updates, self._call_updates = self._call_updates, {}
+        rows = [
+            (status, attempts, outcome, next_attempt_at, updated_at, campaign_id, phone)
+            for (campaign_id, phone), (status, attempts, outcome, next_attempt_at, updated_at) in updates.items()
+        ]
+        try:
+            if self._flush_lock is None:
+                self._write(campaigns, new_calls, rows)
+            else:
+                async with self._flush_lock:
+                    await asyncio.to_thread(self._write, campaigns, new_calls, rows)
+        except Exception:
+            self._requeue(campaigns, new_calls, updates)
+            raise
+
+    def _requeue(self, campaigns: List[tuple], new_calls: List[tuple], updates: Dict):
+        """Puts back changes from a failed flush, under anything queued since."""
+        for row in campaigns:
+            self._campaigns.setdefault(row[0], row)
+        self._new_calls = new_calls + self._new_calls
+        for key, update in updates.items():
+            newer = self._call_updates.get(key)
+            if newer is None:
+                self._call_updates[key] = update
+            else:
+                status, attempts, outcome, next_attempt_at, updated_at = newer
+                self._call_updates[key] = (
+                    status, update[1] + attempts, outcome or update[2], next_attempt_at, updated_at,
+                )
+
+    def _write(self, campaigns: List[tuple], new_calls: List[tuple], updates: List[tuple]):
+        with self._write_lock:
+            self._write_batch(campaigns, new_calls, updates)
+
+    def _write_batch(self, campaigns: List[tuple], new_calls: List[tuple], updates: List[tuple]):
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            db.executemany(
+                "INSERT INTO campaigns (id, name, status, total, concurrency, calls_per_second, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (id) DO UPDATE SET status = excluded.status, total = excluded.total,"
+                " updated_at = excluded.updated_at",
+                campaigns,
+            )
+            db.executemany(
+                "INSERT OR IGNORE INTO calls (campaign_id, phone, seq, updated_at, timezone, call_window)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                new_calls,
+            )
+            db.executemany(
+                "UPDATE calls SET status = ?, attempts = attempts + ?, outcome = COALESCE(?, outcome),"
+                " next_attempt_at = ?, updated_at = ? WHERE campaign_id = ? AND phone = ?",
+                updates,
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        self.flushes += 1
+
+    # -- reads --------------------------------------------------------------
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict]:
+        cursor = self._db.execute(sql, params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def list_campaigns(self) -> List[Dict]:
+        return self._query("SELECT * FROM campaigns ORDER BY created_at")
+
+    def get_campaign(self, campaign_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT * FROM campaigns WHERE id = ?", (campaign_id,))
+        return rows[0] if rows else None
+
+    def unfinished_campaigns(self) -> List[Dict]:
+        return self._query("SELECT * FROM campaigns WHERE status != 'finished' ORDER BY created_at")
+
+    def load_calls(self, campaign_id: str) -> List[tuple]:
+        """(phone, status, attempts, outcome, next_attempt_at, timezone, call_window)
+        for every number of a campaign, in upload order."""
+        return self._db.execute(
+            "SELECT phone, status, attempts, outcome, next_attempt_at, timezone, call_window"
+            " FROM calls WHERE campaign_id = ? ORDER BY seq",
+            (campaign_id,),
+        ).fetchall()
+
+    def call_counts(self, campaign_id: str) -> Dict[str, int]:
+        return dict(self._db.execute(
+            "SELECT status, COUNT(*) FROM calls WHERE campaign_id = ? GROUP BY status", (campaign_id,)
+        ).fetchall())
+
+    def outcome_counts(self, campaign_id: str) -> Dict[str, int]:
+        """How many numbers' latest attempt ended in each outcome."""
+        return dict(self._db.execute(
+            "SELECT outcome, COUNT(*) FROM calls WHERE campaign_id = ? AND outcome IS NOT NULL GROUP BY outcome",
+            (campaign_id,),
+        ).fetchall())
+
+    def call_page(self, campaign_id: str, offset: int, limit: int) -> List[Tuple[str, str]]:
+        """(phone, status) for `limit` numbers starting at upload position `offset`."""
+        # seq numbers each campaign's calls 1, 2, 3... so the page is an index range scan
+        return self._db.execute(
+            "SELECT phone, status FROM calls WHERE campaign_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (campaign_id, offset, limit),
+        ).fetchall()
+
+    def calls_with_status(self, campaign_id: str, status: str, limit: int) -> List[str]:
+        return [row[0] for row in self._db.execute(
+            "SELECT phone FROM calls WHERE campaign_id = ? AND status = ? ORDER BY seq LIMIT ?",
+            (campaign_id, status, limit),
+        )]
+
+    def changed_calls(self, campaign_id: str, since: float, limit: int) -> List[Tuple[str, str]]:
+        """(phone, status) for numbers updated after `since`, oldest change first."""
+        return self._db.execute(
+            "SELECT phone, status FROM calls WHERE campaign_id = ? AND updated_at > ?"
+            " ORDER BY updated_at LIMIT ?",
+            (campaign_id, since, limit),
+        ).fetchall()
+
+    # -- leases (dialer workers) ----------------------------------------------
+    # These write immediately: a claim must be visible to other workers at once.
+
+    def claim_calls(self, owner: str, limit: int, lease_seconds: float) -> List[tuple]:
+        """Leases up to `limit` numbers to `owner` and marks them in progress.
+
+        Numbers whose lease expired come first, then pending numbers that
+        are due in upload order, so retries are picked up as soon as they
+        are due rather than after every fresh number. Campaigns take turns
+        being served first, so concurrent campaigns all make progress.
+
+        Returns (campaign_id, phone, attempts including this one, timezone,
+        call_window, ready_at) per claimed number, ready_at being when it
+        became due: its lease expiry, retry time or last update.
+        """
+        now = time.time()
+        db = self._db
+        columns = (
+            "rowid, campaign_id, phone, attempts, timezone, call_window,"
+            " CASE WHEN status = 'in_progress' THEN lease_expires"
+            " ELSE MAX(updated_at, COALESCE(next_attempt_at, 0)) END"
+        )
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute(
+                f"SELECT {columns} FROM calls"
+                " WHERE status = 'in_progress' AND lease_expires < ? LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            active = [row[0] for row in db.execute(
+                "SELECT id FROM campaigns WHERE status != 'finished' ORDER BY created_at"
+            )]
+            if active:
+                self._claim_round += 1
+                start = self._claim_round % len(active)
+                for campaign_id in active[start:] + active[:start]:
+                    if len(rows) >= limit:
+                        break
+                    rows += db.execute(
+                        f"SELECT {columns} FROM calls WHERE campaign_id = ? AND status = 'pending'"
+                        " AND (next_attempt_at IS NULL OR next_attempt_at <= ?) ORDER BY seq LIMIT ?",
+                        (campaign_id, now, limit - len(rows)),
+                    ).fetchall()
+            db.executemany(
+                "UPDATE calls SET status = 'in_progress', attempts = attempts + 1, next_attempt_at = NULL,"
+                " lease_owner = ?, lease_expires = ?, updated_at = ? WHERE rowid = ?",
+                [(owner, now + lease_seconds, now, row[0]) for row in rows],
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return [(campaign_id, phone, attempts + 1, timezone, window, ready_at)
+                for _, campaign_id, phone, attempts, timezone, window, ready_at in rows]
+
+    def renew_leases(self, owner: str, lease_seconds: float) -> int:
+        """Extends every lease `owner` holds; returns how many it still holds."""
+        return self._db.execute(
+            "UPDATE calls SET lease_expires = ? WHERE lease_owner = ? AND status = 'in_progress'",
+            (time.time() + lease_seconds, owner),
+        ).rowcount
+
+    def complete_calls(self, owner: str, results: List[tuple]):
+        """Records results and finishes campaigns that are done.
+
+        Each result is (campaign_id, phone, status, outcome, next_attempt_at);
+        a number to be retried is "pending" with the time it is due. Results
+        for numbers whose lease was lost to another worker are ignored.
+        """
+        now = time.time()
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(
+                "UPDATE calls SET status = ?, outcome = ?, next_attempt_at = ?, lease_owner = NULL,"
+                " lease_expires = NULL, updated_at = ? WHERE campaign_id = ? AND phone = ? AND lease_owner = ?",
+                [
+                    (status, outcome, next_attempt_at, now, campaign_id, phone, owner)
+                    for campaign_id, phone, status, outcome, next_attempt_at in results
+                ],
+            )
+            self._finish_done_campaigns(now)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def release_calls(self, owner: str, calls: List[Tuple[str, str, Optional[float]]]):
+        """Hands claimed but undialed (campaign_id, phone, not before) numbers back to the queue."""
+        self._db.executemany(
+            "UPDATE calls SET status = 'pending', attempts = attempts - 1, next_attempt_at = ?, lease_owner = NULL,"
+            " lease_expires = NULL, updated_at = ? WHERE campaign_id = ? AND phone = ? AND lease_owner = ?",
+            [(not_before, time.time(), campaign_id, phone, owner) for campaign_id, phone, not_before in calls],
+        )
+
+    def finish_done_campaigns(self):
+        self._finish_done_campaigns(time.time())
+
+    def _finish_done_campaigns(self, now: float):
+        # Campaigns still being uploaded ("ingesting") are left alone
+        self._db.execute(
+            "UPDATE campaigns SET status = 'finished', updated_at = ? WHERE status = 'running'"
+            " AND NOT EXISTS (SELECT 1 FROM calls WHERE calls.campaign_id = campaigns.id"
+            " AND calls.status IN ('pending', 'in_progress'))",
+            (now,),
+        )
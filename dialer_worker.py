@@ -0,0 +1,232 @@
+"""Standalone dialer worker for campaign calls.
+
+Run one or more of these next to the campaign server started with
+CAMPAIGN_DIALER=workers. Each worker claims numbers from the shared campaign
+store with a time-limited lease, dials them with make_travel_planning_call()
+and renews its leases while it works. If a worker dies, its leases expire
+and the numbers are claimed again by the others, so dial capacity scales by
+simply starting more workers. Numbers that don't answer, are busy or fail
+to dial are put back with a retry time (see call_scheduling.py); numbers
+claimed outside their calling window go back until it opens.
+
+    python dialer_worker.py
+"""
+
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from call_scheduling import CallingWindow, RetryPolicy
+from campaign_store import CampaignStore
+from latency_metrics import observe, serve_metrics
+from suppression import SUPPRESS_CALLED, SuppressionList
+from langgraph_make_call import (
+    CONNECTED,
+    DIAL_ERROR,
+    CallResult,
+    close_livekit_api,
+    make_travel_planning_call,
+    start_livekit_api,
+)
+
+load_dotenv()
+
+DIALER_WORKER_ID = os.getenv("DIALER_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+# Per-worker limits; total dial capacity is the sum over all workers
+DIALER_CONCURRENCY = int(os.getenv("DIALER_CONCURRENCY", "10"))
+DIALER_CALLS_PER_SECOND = float(os.getenv("DIALER_CALLS_PER_SECOND", "1"))
+# A claimed number goes back to the pool if its lease isn't renewed in time
+DIALER_LEASE_SECONDS = float(os.getenv("DIALER_LEASE_SECONDS", "60"))
+# How often results are written back, and how long to wait when the queue is empty
+DIALER_FLUSH_SECONDS = float(os.getenv("DIALER_FLUSH_SECONDS", "0.5"))
+DIALER_POLL_SECONDS = float(os.getenv("DIALER_POLL_SECONDS", "1"))
+# Serve this worker's dial and queue wait histograms on :port/metrics; 0 disables
+DIALER_METRICS_PORT = int(os.getenv("DIALER_METRICS_PORT", "0"))
+
+
+class TokenBucket:
+    """Token bucket limiting how many calls may start per second."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # A non-positive rate disables limiting entirely
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class DialerWorker:
+    """Claims, dials and reports numbers from the shared campaign store."""
+
+    def __init__(self, store: CampaignStore, worker_id: str = DIALER_WORKER_ID,
+                 concurrency: int = DIALER_CONCURRENCY, calls_per_second: float = DIALER_CALLS_PER_SECOND,
+                 lease_seconds: float = DIALER_LEASE_SECONDS, flush_seconds: float = DIALER_FLUSH_SECONDS,
+                 poll_seconds: float = DIALER_POLL_SECONDS, retry_policy: Optional[RetryPolicy] = None,
+                 window: Optional[CallingWindow] = None, suppression: Optional[SuppressionList] = None):
+        self.store = store
+        self.worker_id = worker_id
+        self.concurrency = max(1, concurrency)
+        self.calls_per_second = calls_per_second
+        self.lease_seconds = lease_seconds
+        self.flush_seconds = flush_seconds
+        self.poll_seconds = poll_seconds
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.window = window or CallingWindow()
+        # Connected numbers are added here so later campaigns skip them
+        self.suppression = suppression
+        self.in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+        # Claimed (campaign_id, phone, attempts, ready_at) still waiting for the rate limiter
+        self.claimed: List[Tuple[str, str, int, float]] = []
+        # (campaign_id, phone, status, outcome, next_attempt_at)
+        self.results: List[tuple] = []
+        self.dialed = 0
+        self._slot_freed: Optional[asyncio.Event] = None
+        self._db_lock: Optional[asyncio.Lock] = None
+
+    async def _db(self, method, *args):
+        # One connection per worker; calls are serialized and kept off the event loop
+        async with self._db_lock:
+            return await asyncio.to_thread(method, *args)
+
+    async def run(self):
+        self._slot_freed = asyncio.Event()
+        self._db_lock = asyncio.Lock()
+        bucket = TokenBucket(self.calls_per_second)
+        maintenance = asyncio.create_task(self._maintain())
+        try:
+            while True:
+                free = self.concurrency - len(self.in_flight)
+                if free <= 0:
+                    self._slot_freed.clear()
+                    await self._slot_freed.wait()
+                    continue
+                claims = await self._db(self.store.claim_calls, self.worker_id, free, self.lease_seconds)
+                if not claims:
+                    await asyncio.sleep(self.poll_seconds)
+                    continue
+                now = time.time()
+                closed = []
+                for campaign_id, phone, attempts, timezone, window, ready_at in claims:
+                    opens = self.window.next_open(now, timezone, window)
+                    if opens > now:
+                        closed.append((campaign_id, phone, opens))
+                    else:
+                        self.claimed.append((campaign_id, phone, attempts, ready_at))
+                if closed:
+                    # Outside the number's calling window: back to the queue until it opens
+                    await self._db(self.store.release_calls, self.worker_id, closed)
+                while self.claimed:
+                    await bucket.acquire()
+                    campaign_id, phone, attempts, ready_at = self.claimed.pop(0)
+                    observe("queue_wait", max(0.0, time.time() - ready_at), dialer="worker")
+                    self.in_flight[(campaign_id, phone)] = asyncio.create_task(self._dial(campaign_id, phone, attempts))
+        finally:
+            maintenance.cancel()
+            for task in self.in_flight.values():
+                task.cancel()
+            # Undialed claims go straight back; calls cut off mid-dial are
+            # retried by another worker once their lease expires
+            if self.claimed:
+                await self._db(self.store.release_calls, self.worker_id,
+                               [(campaign_id, phone, None) for campaign_id, phone, _, _ in self.claimed])
+            await self._flush()
+
+    async def _dial(self, campaign_id: str, phone: str, attempts: int):
+        try:
+            try:
+                result = await make_travel_planning_call(phone)
+            except Exception as e:
+                # Failed dials come back as outcomes; anything raised is unexpected
+                result = CallResult(DIAL_ERROR, True, str(e))
+            retry_at = None
+            if result.outcome == CONNECTED:
+                status = "completed"
+                if self.suppression is not None:
+                    await self.suppression.add_called(phone, f"campaign {campaign_id}")
+            else:
+                retry_at = self.retry_policy.next_attempt(attempts, result, time.time())
+                status = "failed" if retry_at is None else "pending"
+            self.results.append((campaign_id, phone, status, result.outcome, retry_at))
+            self.dialed += 1
+        except Exception as e:
+            # Finish the number rather than leave it leased to this worker for good
+            print(f"⚠️  Could not record the call to {phone}: {e}")
+            self.results.append((campaign_id, phone, "failed", DIAL_ERROR, None))
+        finally:
+            # A number left in in_flight would hold its slot and have its lease renewed forever
+            del self.in_flight[(campaign_id, phone)]
+            self._slot_freed.set()
+
+    async def _flush(self):
+        if self.results:
+            results, self.results = self.results, []
+            try:
+                await self._db(self.store.complete_calls, self.worker_id, results)
+            except Exception:
+                self.results = results + self.results
+                raise
+
+    async def _maintain(self):
+        """Writes results in batches and renews leases well before they expire."""
+        renewed = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self._flush()
+                if time.monotonic() - renewed >= self.lease_seconds / 3:
+                    await self._db(self.store.renew_leases, self.worker_id, self.lease_seconds)
+                    renewed = time.monotonic()
+                if not self.in_flight and not self.claimed:
+                    # Campaigns whose last numbers were finished elsewhere
+                    await self._db(self.store.finish_done_campaigns)
+            except sqlite3.Error as e:
+                # Busy or locked store; results stay queued for the next round
+                print(f"⚠️  Campaign store unavailable: {e}")
+
+
+async def main():
+    store = CampaignStore()
+    store.open()
+    suppression = None
+    if SUPPRESS_CALLED:
+        suppression = SuppressionList()
+        suppression.open()
+    await start_livekit_api()
+    if DIALER_METRICS_PORT:
+        serve_metrics(DIALER_METRICS_PORT)
+    worker = DialerWorker(store, suppression=suppression)
+    print(f"📞 Dialer worker {worker.worker_id} started "
+          f"(concurrency {worker.concurrency}, {worker.calls_per_second} calls/s, lease {worker.lease_seconds}s)")
+    try:
+        await worker.run()
+    finally:
+        await close_livekit_api()
+        await store.close()
+        if suppression is not None:
+            suppression.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
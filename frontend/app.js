@@ -10,6 +10,26 @@ const bar = document.getElementById('bar');
 const chipTotal = document.getElementById('chipTotal');
 const chipCompleted = document.getElementById('chipCompleted');
 const chipFailed = document.getElementById('chipFailed');
+const pageLabel = document.getElementById('pageLabel');
+const prevPage = document.getElementById('prevPage');
+const nextPage = document.getElementById('nextPage');
+// Campaign started from this page; until then /status shows the latest one
+let campaignId = null;
+
+// Numbers are shown a page at a time; after that, changes are pushed over Server-Sent Events
+const PAGE_SIZE = 500;
+const PILL_CLASS = { pending: 'pending', in_progress: 'running', completed: 'done', failed: 'failed' };
+let view = { id: null, offset: 0 };
+let total = 0;
+// phone -> pill element, for the numbers on the current page
+const pills = new Map();
+let refreshing = null;
+let reload = false;
+let source = null;
+// Campaign the stream follows; null while /events hasn't said which is the latest
+let streamId = null;
+// Changes pushed while a page is loading; applied once it is rendered
+let buffered = null;
 
 function createToast(message, type = 'success') {
   const container = document.getElementById('toasts');
@@ -21,10 +41,88 @@ function createToast(message, type = 'success') {
   setTimeout(() => el.remove(), 3500);
 }
 
-async function refresh() {
-  const r = await fetch('/status');
-  const s = await r.json();
-  const pct = s.total ? Math.round(((s.completed.length) / s.total) * 100) : 0;
+function pill(number, status) {
+  const el = document.createElement('span');
+  el.className = `pill ${PILL_CLASS[status] || 'pending'}`;
+  el.textContent = number;
+  return el;
+}
+
+function renderPage(items) {
+  pills.clear();
+  const fragment = document.createDocumentFragment();
+  for (const [number, status] of items) {
+    const el = pill(number, status);
+    pills.set(number, el);
+    fragment.appendChild(el);
+  }
+  numbersEl.replaceChildren(fragment);
+  if (!items.length) numbersEl.textContent = '-';
+}
+
+function applyChanges(changes) {
+  for (const [number, status] of changes) {
+    const el = pills.get(number);
+    if (el) el.className = `pill ${PILL_CLASS[status] || 'pending'}`;
+  }
+}
+
+function renderPager() {
+  const last = Math.min(view.offset + PAGE_SIZE, total);
+  pageLabel.textContent = total ? `${view.offset + 1}–${last} of ${total}` : '';
+  prevPage.disabled = view.offset === 0;
+  nextPage.disabled = last >= total;
+}
+
+function refresh() {
+  // Don't stack requests when the server is slow to answer; load once more afterwards if asked again
+  if (refreshing) {
+    reload = true;
+    return refreshing;
+  }
+  refreshing = load().finally(() => {
+    refreshing = null;
+    if (reload) {
+      reload = false;
+      refresh();
+    }
+  });
+  return refreshing;
+}
+
+async function load() {
+  const params = new URLSearchParams({ offset: view.offset, limit: PAGE_SIZE });
+  buffered = [];
+  let s;
+  try {
+    const r = await fetch(`${campaignId ? `/campaigns/${campaignId}/status` : '/status'}?${params}`);
+    s = await r.json();
+  } catch (err) {
+    buffered = null;
+    throw err;
+  }
+  if (s.id !== view.id) {
+    // First load, or another campaign became the latest: start from its first page
+    view = { id: s.id, offset: 0 };
+    if (s.page.offset !== 0) return load();
+  }
+  // The stream may still be on the campaign that was latest when it connected
+  if (streamId && s.id !== streamId) connect(s.id);
+  renderSummary(s);
+  renderPage(s.page.items);
+  // Pushed changes the page already includes are skipped
+  for (const event of buffered) {
+    if (event.version > s.version) applyChanges(event.changes);
+  }
+  buffered = null;
+  renderPager();
+}
+
+function renderSummary(s) {
+  total = s.total || 0;
+  const counts = s.counts || {};
+  const outcomes = s.outcomes || {};
+  const pct = total ? Math.round(((counts.completed || 0) / total) * 100) : 0;
 
   // badge state
   runBadge.textContent = s.running ? 'Running' : 'Idle';
@@ -35,9 +133,9 @@ async function refresh() {
   }
 
   // stats + progress
-  statTotal.textContent = s.total || 0;
-  statCompleted.textContent = s.completed?.length || 0;
-  statFailed.textContent = s.failed?.length || 0;
+  statTotal.textContent = total;
+  statCompleted.textContent = counts.completed || 0;
+  statFailed.textContent = counts.failed || 0;
   // mirror in chips
   if (chipTotal) chipTotal.textContent = statTotal.textContent;
   if (chipCompleted) chipCompleted.textContent = statCompleted.textContent;
@@ -46,40 +144,77 @@ async function refresh() {
   bar.style.width = pct + '%';
   bar.classList.toggle('active', !!s.running);
 
-  const pendingPills = (s.pending || []).map(n => `<span class="pill pending">${n}</span>`).join(' ');
-  const completedPills = (s.completed || []).map(n => `<span class="pill done">${n}</span>`).join(' ');
-  const failedPills = (s.failed || []).map(n => `<span class="pill failed">${n}</span>`).join(' ');
+  const runningPills = (s.in_progress || []).map(n => `<span class="pill running">${n}</span>`).join(' ');
 
   statusEl.innerHTML = `
     <table>
       <tr><th>In Progress</th><th>Progress</th></tr>
       <tr>
-        <td>${s.in_progress ? `<span class="pill running">${s.in_progress}</span>` : '-'}</td>
+        <td class="list">${runningPills || '-'}</td>
         <td>${pct}%</td>
       </tr>
     </table>
     <table>
-      <tr><th>Pending</th><th>Completed</th><th>Failed</th></tr>
+      <tr><th>Pending</th><th>In Progress</th><th>Completed</th><th>Failed</th></tr>
       <tr>
-        <td class="list">${pendingPills || '-'}</td>
-        <td class="list">${completedPills || '-'}</td>
-        <td class="list">${failedPills || '-'}</td>
+        <td>${counts.pending || 0}</td>
+        <td>${counts.in_progress || 0}</td>
+        <td>${counts.completed || 0}</td>
+        <td>${counts.failed || 0}</td>
+      </tr>
+    </table>
+    <table>
+      <tr><th>Connected</th><th>No Answer</th><th>Busy</th><th>Dial Error</th></tr>
+      <tr>
+        <td>${outcomes.connected || 0}</td>
+        <td>${outcomes.no_answer || 0}</td>
+        <td>${outcomes.busy || 0}</td>
+        <td>${outcomes.dial_error || 0}</td>
       </tr>
     </table>
   `;
 
-  const allSet = new Set([...(s.pending || []), ...(s.completed || []), ...(s.failed || []), ...(s.in_progress ? [s.in_progress] : [])]);
-  const items = Array.from(allSet).map(n => {
-    let cls = 'pending';
-    if (s.in_progress === n) cls = 'running';
-    else if (s.completed?.includes(n)) cls = 'done';
-    else if (s.failed?.includes(n)) cls = 'failed';
-    return `<span class="pill ${cls}">${n}</span>`;
-  });
-  numbersEl.innerHTML = items.join(' ') || '-';
   numbersEl.classList.toggle('loading', !!s.running);
 }
 
+function connect(id = campaignId) {
+  if (source) source.close();
+  streamId = id;
+  source = new EventSource(id ? `/campaigns/${id}/events` : '/events');
+  // (Re)connected: changes may have been missed, so reload the page shown
+  source.addEventListener('open', () => showPage(view.offset));
+  source.addEventListener('changes', (e) => {
+    const event = JSON.parse(e.data);
+    if (buffered) buffered.push(event);
+    else applyChanges(event.changes);
+  });
+  source.addEventListener('snapshot', (e) => {
+    const s = JSON.parse(e.data);
+    if (!streamId) streamId = s.id;
+    if (s.id !== view.id) {
+      // The page and the stream disagree on the latest campaign; reloading moves both to it
+      if (!refreshing) showPage(0);
+      return;
+    }
+    renderSummary(s);
+    renderPager();
+  });
+  // We fell too far behind for individual changes
+  source.addEventListener('reset', () => showPage(view.offset));
+  source.addEventListener('error', () => {
+    // Closed for good, e.g. no campaign yet; try again later
+    if (source.readyState === EventSource.CLOSED) setTimeout(connect, 5000);
+  });
+}
+
+function showPage(offset) {
+  view.offset = Math.max(0, offset);
+  refresh();
+}
+
+prevPage.addEventListener('click', () => showPage(view.offset - PAGE_SIZE));
+nextPage.addEventListener('click', () => showPage(view.offset + PAGE_SIZE));
+
 document.getElementById('uploadForm').addEventListener('submit', async (e) => {
   e.preventDefault();
   const fileInput = document.getElementById('fileInput');
@@ -92,8 +227,12 @@ document.getElementById('uploadForm').addEventListener('submit', async (e) => {
     const resp = await fetch('/upload', { method: 'POST', body: fd });
     if (!resp.ok) throw new Error('Upload failed');
     const data = await resp.json().catch(() => ({ total: 0 }));
+    if (data.campaign_id) {
+      campaignId = data.campaign_id;
+      view = { id: null, offset: 0 };
+    }
     createToast(`Campaign started for ${data.total ?? 0} numbers`, 'success');
-    await refresh();
+    connect();
   } catch (err) {
     startBtn.disabled = false;
     startBtn.textContent = 'Start Campaign';
@@ -101,8 +240,7 @@ document.getElementById('uploadForm').addEventListener('submit', async (e) => {
   }
 });
 
-setInterval(refresh, 2000);
-refresh();
+connect();
 
 // Theme logic: apply, persist, and toggle
 const THEME_KEY = "theme";
@@ -2,22 +2,159 @@
 
 import asyncio
 import os
+import time
+import uuid
+from collections import deque
+from typing import NamedTuple, Optional
+
+import aiohttp
 from dotenv import load_dotenv
+from google.protobuf.duration_pb2 import Duration
 from livekit import api
 
+from latency_metrics import call_trace, observe
+
 load_dotenv()
 
-async def make_travel_planning_call(phone_number: str = "+000000000000"):
+# Connection pool size for the shared LiveKit client
+LIVEKIT_MAX_CONNECTIONS = int(os.getenv("LIVEKIT_MAX_CONNECTIONS", "100"))
+# How long a dialed number may ring before the attempt counts as unanswered
+CALL_RINGING_SECONDS = int(os.getenv("CALL_RINGING_SECONDS", "30"))
+
+# Outcomes of one dial attempt
+CONNECTED = "connected"
+NO_ANSWER = "no_answer"
+BUSY = "busy"
+DIAL_ERROR = "dial_error"
+
+# SIP responses that mean the callee didn't pick up or was on another call
+SIP_NO_ANSWER = {408, 480, 487}
+SIP_BUSY = {486, 600}
+
+# Long-lived LiveKit client shared by every call made from this process
+_shared_livekit_api: Optional[api.LiveKitAPI] = None
+_shared_http_session: Optional[aiohttp.ClientSession] = None
+
+
+class DialLatencyStats:
+    """Rolling latency samples for create_sip_participant requests."""
+
+    def __init__(self, max_samples: int = 1000):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.errors = 0
+
+    def record(self, seconds: float, ok: bool = True):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.samples.append(seconds * 1000)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.samples)
+
+        def pct(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1)
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(sum(ordered) / len(ordered), 1) if ordered else None,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(ordered[-1], 1) if ordered else None,
+        }
+
+
+class CallResult(NamedTuple):
+    """What happened when a number was dialed."""
+
+    outcome: str
+    # Whether trying the number again later could succeed
+    retryable: bool = False
+    detail: str = ""
+
+
+def classify_call_error(e: Exception) -> CallResult:
+    """Maps a failed create_sip_participant request to a call outcome."""
+    if isinstance(e, asyncio.TimeoutError):
+        # Rang past the request timeout
+        return CallResult(NO_ANSWER, True, "ringing timed out")
+    code = getattr(e, "sip_status_code", None)
+    if code in SIP_NO_ANSWER:
+        return CallResult(NO_ANSWER, True, str(e))
+    if code in SIP_BUSY:
+        return CallResult(BUSY, True, str(e))
+    if code is not None and 400 <= code < 500:
+        # Unknown or malformed number, forbidden destination...: dialing again won't help
+        return CallResult(DIAL_ERROR, False, str(e))
+    # Trunk or server trouble, network errors
+    return CallResult(DIAL_ERROR, True, str(e))
+
+
+# Dial latency split by client type, so pooled vs one-off clients can be compared
+dial_stats = {
+    "pooled": DialLatencyStats(),
+    "unpooled": DialLatencyStats(),
+}
+
+
+async def start_livekit_api(max_connections: int = LIVEKIT_MAX_CONNECTIONS) -> api.LiveKitAPI:
+    """Create the shared, connection-pooled LiveKit client (idempotent)."""
+    global _shared_livekit_api, _shared_http_session
+    if _shared_livekit_api is None:
+        connector = aiohttp.TCPConnector(limit=max_connections, keepalive_timeout=60, ttl_dns_cache=300)
+        _shared_http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+        _shared_livekit_api = api.LiveKitAPI(session=_shared_http_session)
+    return _shared_livekit_api
+
+
+async def close_livekit_api():
+    """Close the shared LiveKit client and its HTTP connection pool."""
+    global _shared_livekit_api, _shared_http_session
+    if _shared_livekit_api is not None:
+        await _shared_livekit_api.aclose()
+        _shared_livekit_api = None
+    if _shared_http_session is not None:
+        await _shared_http_session.close()
+        _shared_http_session = None
+
+
+def get_dial_stats() -> dict:
+    return {mode: stats.snapshot() for mode, stats in dial_stats.items()}
+
+
+async def make_travel_planning_call(phone_number: str = "+000000000000", livekit_api: Optional[api.LiveKitAPI] = None,
+                                    room_name: Optional[str] = None) -> CallResult:
     """
     Make an outbound call to start a travel planning conversation.
     
     Args:
         phone_number: The phone number to call (default: +000000000000)
+        livekit_api: Client to dial with. Defaults to the shared pooled client
+            if one was started, otherwise a one-off client is created and closed.
+        room_name: Room to call into. Reusing the room of a dropped call resumes
+            its checkpointed conversation; defaults to a new unique room.
+
+    Returns:
+        The outcome once the call was answered or the attempt failed; this
+        waits through ringing (up to CALL_RINGING_SECONDS).
     """
-    livekit_api = api.LiveKitAPI()
+    livekit_api = livekit_api or _shared_livekit_api
+    owns_client = livekit_api is None
+    if owns_client:
+        livekit_api = api.LiveKitAPI()
+    client = "unpooled" if owns_client else "pooled"
+    stats = dial_stats[client]
     
-    # Generate unique room name for this call
-    room_name = f"travel-planning-{int(asyncio.get_event_loop().time())}"
+    # Generate unique room name for this call (safe for concurrent dialing)
+    room_name = room_name or f"travel-planning-{int(time.time())}-{uuid.uuid4().hex[:8]}"
     
     # Create SIP participant for outbound call
     request = api.CreateSIPParticipantRequest(
@@ -25,27 +162,52 @@ async def make_travel_planning_call(phone_number: str = "+000000000000"):
         sip_call_to=phone_number,
         room_name=room_name,
         participant_identity="travel_caller",
-        participant_name="Travel Planning Call"
+        participant_name="Travel Planning Call",
+        # Answer, busy and no-answer come back as the request's result
+        wait_until_answered=True,
+        ringing_timeout=Duration(seconds=CALL_RINGING_SECONDS),
     )
     
+    dial_seconds = None
     try:
         print(f"🌍 Initiating travel planning call to {phone_number}...")
         print(f"📞 Room: {room_name}")
         print("🤖 The AI travel agent will greet you and help plan your trip!")
         
-        participant = await livekit_api.sip.create_sip_participant(request)
+        started = time.perf_counter()
+        try:
+            participant = await livekit_api.sip.create_sip_participant(request)
+        except Exception:
+            dial_seconds = time.perf_counter() - started
+            stats.record(dial_seconds, ok=False)
+            raise
+        dial_seconds = time.perf_counter() - started
+        stats.record(dial_seconds)
         
-        print(f"\n📱 Answer the call on {phone_number} to start your travel planning session!")
+        print(f"\n📱 {phone_number} answered; the travel planning session has started!")
+        result = CallResult(CONNECTED)
         
     except Exception as e:
-        print(f"❌ Error making call: {e}")
-        print("\n🔧 Troubleshooting tips:")
-        print("   1. Make sure your SIP trunk is configured in LiveKit Cloud")
-        print("   2. Verify the SIP trunk ID is correct")
-        print("   3. Ensure the phone number format is correct (+country_code_number)")
-        print("   4. Check that your LiveKit API credentials are set in .env")
-    
-    await livekit_api.aclose()
+        result = classify_call_error(e)
+        if result.outcome == NO_ANSWER:
+            print(f"📵 No answer from {phone_number}")
+        elif result.outcome == BUSY:
+            print(f"📵 {phone_number} is busy")
+        else:
+            print(f"❌ Error making call: {e}")
+            print("\n🔧 Troubleshooting tips:")
+            print("   1. Make sure your SIP trunk is configured in LiveKit Cloud")
+            print("   2. Verify the SIP trunk ID is correct")
+            print("   3. Ensure the phone number format is correct (+country_code_number)")
+            print("   4. Check that your LiveKit API credentials are set in .env")
+    finally:
+        if owns_client:
+            await livekit_api.aclose()
+    if dial_seconds is not None:
+        # Traced under the room name, next to the agent's own trace of the call
+        with call_trace(room_name):
+            observe("dial", dial_seconds, client=client, outcome=result.outcome)
+    return result
 
 async def make_call_interactive():
     """Interactive version that asks for phone number."""
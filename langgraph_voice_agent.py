@@ -1,19 +1,74 @@
 """Voice-enabled LangGraph travel planning agent with LiveKit integration"""
 
-from typing import TypedDict, List, Dict, Optional
+from typing import TypedDict, List, Dict, Optional, Tuple, AsyncIterator, Literal
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.config import get_stream_writer
+from langgraph.types import Command, interrupt
 import os
+import re
 import asyncio
+import logging
+import tempfile
+import time
+import uuid
+import aiosqlite
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import BaseModel, Field
 
 from livekit import agents
 from livekit.agents import AgentSession, Agent, RoomInputOptions
 from livekit.plugins import google, cartesia, deepgram, noise_cancellation
 
+from audio_cache import AUDIO_CACHE, AudioCache, split_known
+from latency_metrics import observe, publish_metrics, serve_metrics, start_trace, timed
+from llm_deadlines import llm_deadlines
+from plan_cache import plan_cache, plan_key
+from slot_extraction import (
+    extract_slots,
+    fast_path_hit_rate,
+    record_fast_path,
+)
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger("travel-planning-agent")
+
+DEFAULT_LLM_MODEL = "gemini-2.0-flash"
+DEFAULT_LLM_TEMPERATURE = 0.7
+
+# Warm the LLM connection when a job starts so the first turn skips setup
+LLM_WARMUP = os.getenv("LLM_WARMUP", "0") == "1"
+
+# Stream itinerary/summary tokens into TTS sentence by sentence
+STREAM_PRESENTATION = os.getenv("STREAM_PRESENTATION", "1") == "1"
+
+# Start plan generation while the preference question is still being asked:
+# "likely" plans only the one the budget suggests, "both" luxury and economy
+# (twice the LLM spend), "0" turns speculation off. Speculative plans are
+# handed over via the plan cache.
+SPECULATIVE_PLANNING = os.getenv("SPECULATIVE_PLANNING", "likely")
+SPECULATIVE_LUXURY_BUDGET = int(os.getenv("SPECULATIVE_LUXURY_BUDGET", "5000"))
+
+# Utterances arriving within this many seconds of each other form one turn
+TURN_COALESCE_SECONDS = float(os.getenv("TURN_COALESCE_SECONDS", "0.5"))
+
+# Conversation checkpoints, keyed by room name. Shared by every worker process
+# on the host, so a dropped call or restarted worker resumes where it stopped.
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
+
+# Per-stage latency histograms on :AGENT_METRICS_PORT/metrics ("0" disables).
+# Jobs run in their own processes and publish their histograms to
+# AGENT_METRICS_DIR (a fresh temporary directory by default) for the worker.
+AGENT_METRICS_PORT = int(os.getenv("AGENT_METRICS_PORT", "8091"))
+AGENT_METRICS_DIR = os.getenv("AGENT_METRICS_DIR", "")
+
+# Also part of the audio cache key: changing either re-synthesizes the fixed prompts
+TTS_MODEL = "sonic-2"
+TTS_VOICE = "f786b574-daa5-4673-aa0c-cbe3e8534c02"
+
 class TravelState(TypedDict):
     budget: Optional[int]
     activities: List[str]
@@ -25,43 +80,310 @@ class TravelState(TypedDict):
     current_step: str
     user_message: Optional[str]
     agent_response: Optional[str]
+    # Slot extractions answered locally vs. by an LLM round trip in this call
+    fast_path_hits: int
+    llm_extractions: int
+
+ACTIVITIES_QUESTION = "Now, what activities do you enjoy when traveling? For example, museums, hiking, beaches, food tours, nightlife, or shopping?"
+PREFERENCE_QUESTION = "Now, do you prefer luxury experiences with premium accommodations and services, or are you more budget-conscious looking for good value options?"
+PLANNING_ACKNOWLEDGMENT = "Perfect! I have all the information I need. Let me create your personalized travel plan. This will take just a moment..."
+
+BUDGET_QUESTION = "What's your total budget for this trip?"
+GREETING = f"Hello! I'm your AI travel planning assistant. I'm excited to help you plan your perfect trip! Let's start with your budget. {BUDGET_QUESTION}"
+RESUME_GREETING = "Welcome back! Let's pick up where we left off."
+RESUME_PLANNING = "Your travel plan is almost ready. Just say the word and I'll walk you through it."
+RESUME_COMPLETE = "Your travel plan is ready. Is there anything you'd like me to adjust or explain further?"
+COMPLETED_REPLY = "Thank you for using our travel planning service! Feel free to ask if you need any adjustments to your plan."
+
+# Collection order, and the step/question used while each slot is missing
+SLOT_ORDER = ("budget", "activities", "preference")
+SLOT_STEPS = {
+    "budget": "budget_collection",
+    "activities": "activities_collection",
+    "preference": "preference_collection",
+}
+SLOT_QUESTIONS = {
+    "budget": f"Now, {BUDGET_QUESTION[0].lower()}{BUDGET_QUESTION[1:]}",
+    "activities": ACTIVITIES_QUESTION,
+    "preference": PREFERENCE_QUESTION,
+}
+SLOT_REASK = {
+    "budget": "I'd like to understand your budget better. Could you tell me how much you're planning to spend on this trip in dollars?",
+    "activities": "What kind of activities do you enjoy? For example: sightseeing, adventure sports, cultural experiences, food and dining, or relaxation?",
+    "preference": "Would you prefer luxury accommodations and experiences, or are you looking for more budget-friendly options?",
+}
+
+# Spoken verbatim on every call, so their audio is pre-synthesized (python audio_cache.py)
+FIXED_PROMPTS = (
+    GREETING,
+    RESUME_GREETING,
+    RESUME_PLANNING,
+    RESUME_COMPLETE,
+    COMPLETED_REPLY,
+    PLANNING_ACKNOWLEDGMENT,
+    *SLOT_QUESTIONS.values(),
+    *SLOT_REASK.values(),
+)
+
+class TravelSlots(BaseModel):
+    """Structured output for one-shot extraction of every travel slot."""
+    budget: Optional[int] = Field(None, description="Total trip budget in US dollars, if stated")
+    activities: List[str] = Field(default_factory=list, description="Activities the caller wants to do, as short names")
+    preference: Optional[Literal["luxury", "economy"]] = Field(None, description="Travel style, if stated")
+    reply: Optional[str] = Field(None, description="Short helpful reply if the caller asked a question or was unclear")
+
+def slot_extraction_prompt(user_input: str, missing: List[str], asked: str) -> str:
+    return f"""
+        The caller said: "{user_input}" while we were asking about their {asked}.
+        
+        Extract every trip detail they stated, even ones we did not ask about yet.
+        Still missing: {', '.join(missing)}.
+        - budget: total budget in US dollars as a whole number
+        - activities: activities they want to do, as short names
+        - preference: "luxury" or "economy" travel style
+        Leave a field empty if it was not mentioned.
+        
+        If they asked a question, seem unsure, or gave no usable {asked}, put a short
+        helpful reply in "reply" that ends by asking about their {asked} again.
+        """
+
+# Per-process LLM clients keyed on (model, temperature). Each client keeps its
+# own HTTP transport, so reusing it reuses the underlying connections.
+_llm_cache: Dict[Tuple[str, float], ChatGoogleGenerativeAI] = {}
 
 # Initialize the LLM with proper API key handling
-def get_llm():
+def get_llm(model: str = DEFAULT_LLM_MODEL, temperature: float = DEFAULT_LLM_TEMPERATURE):
+    key = (model, temperature)
+    llm = _llm_cache.get(key)
+    if llm is not None:
+        return llm
+
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GOOGLE_API_KEY not found in environment variables")
     
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash",
+    llm = ChatGoogleGenerativeAI(
+        model=model,
         google_api_key=api_key,
-        temperature=0.7
+        temperature=temperature
     )
+    _llm_cache[key] = llm
+    return llm
+
+_slot_extractor = None
+
+def get_slot_extractor():
+    """Deterministic structured-output runnable that fills TravelSlots in one call."""
+    global _slot_extractor
+    if _slot_extractor is None:
+        _slot_extractor = get_llm(temperature=0).with_structured_output(TravelSlots)
+    return _slot_extractor
+
+async def warm_llm(model: str = DEFAULT_LLM_MODEL, temperature: float = DEFAULT_LLM_TEMPERATURE):
+    """Builds the cached client and opens its connection with a tiny request."""
+    try:
+        await get_llm(model, temperature).ainvoke("Reply with OK.")
+    except Exception as e:
+        logger.warning("LLM warm-up failed: %s", e)
+
+def itinerary_prompt(state: TravelState) -> str:
+    return f"""
+        Create a concise 3-day travel itinerary for:
+        - Budget: ${state['budget']}
+        - Activities: {', '.join(state['activities'])}
+        - Style: {state['preference']}
+        
+        Keep it brief but engaging. Include specific attractions and activities.
+        Format as Day 1, Day 2, Day 3.
+        """
+
+def fallback_itinerary(state: TravelState) -> str:
+    return "Day 1: City exploration and local cuisine\nDay 2: Main attractions and cultural sites\nDay 3: Leisure activities and shopping"
+
+def summary_prompt(state: TravelState) -> str:
+    return f"""
+        Create a brief travel summary highlighting:
+        - Budget: ${state['budget']}
+        - Best flight option: {state['flight_options'][0] if state['flight_options'] else 'Standard option'}
+        - Recommended hotel: {state['hotel_options'][0] if state['hotel_options'] else 'Standard hotel'}
+        - Key highlights from the itinerary
+        
+        Keep it concise and exciting.
+        """
+
+def summary_prices(state: TravelState) -> Tuple[int, ...]:
+    """Prices summary_prompt() quotes, which a cached summary repeats verbatim."""
+    return tuple(options[0]["price"] for options in (state.get("flight_options"), state.get("hotel_options")) if options)
+
+def fallback_summary(state: TravelState) -> str:
+    return f"Your ${state['budget']} travel plan includes flights, accommodation, and activities tailored to your {state['preference']} preferences."
+
+PRESENTATION_INTRO = "Here's your personalized travel plan!"
+PRESENTATION_ITINERARY_HEADING = "Your 3-day itinerary:"
+PRESENTATION_CLOSING = "I hope you have an amazing trip! Is there anything specific you'd like me to adjust or explain further about your travel plan?"
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+_MARKDOWN = re.compile(r"[*#_`]+")
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+async def stream_sentences(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Groups streamed text chunks into complete sentences, ready for TTS."""
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        *complete, buffer = _SENTENCE_BOUNDARY.split(buffer)
+        for sentence in complete:
+            sentence = _MARKDOWN.sub("", sentence).strip()
+            if sentence:
+                yield sentence
+    sentence = _MARKDOWN.sub("", buffer).strip()
+    if sentence:
+        yield sentence
+
+def split_sentences(text: str) -> List[str]:
+    """Already generated text as the sentences stream_sentences() would yield."""
+    sentences = (_MARKDOWN.sub("", sentence).strip() for sentence in _SENTENCE_BOUNDARY.split(text or ""))
+    return [sentence for sentence in sentences if sentence]
+
+async def stream_llm_text(prompt: str) -> AsyncIterator[str]:
+    async for chunk in get_llm().astream(prompt):
+        if isinstance(chunk.content, str) and chunk.content:
+            yield chunk.content
+
+def plan_stream_writer():
+    """Writer for the graph's "custom" stream; a no-op when called outside a graph run."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda event: None
+
+class PlanPresentation:
+    """Turns the plan sentences streamed out of the graph into one spoken script.
+
+    The summary and itinerary nodes run concurrently and emit each sentence
+    as soon as it is complete, so the presentation can be spoken while the
+    rest of the text is still being generated.
+
+    Nodes that finished before a resumed run don't stream again, so their
+    parts are filled from the saved state instead.
+    """
+
+    def __init__(self) -> None:
+        self._queues = {"summary": asyncio.Queue(), "itinerary": asyncio.Queue()}
+        # Parts that have received sentences, and parts that are fully queued
+        self._started = set()
+        self._ended = set()
+
+    def feed(self, event: Dict):
+        """Takes a {"plan": kind, "sentence": text} event; a None sentence ends that part."""
+        kind = event.get("plan")
+        if kind not in self._queues or kind in self._ended:
+            return
+        sentence = event.get("sentence")
+        self._queues[kind].put_nowait(sentence)
+        if sentence is None:
+            self._ended.add(kind)
+        else:
+            self._started.add(kind)
+
+    def fill(self, state: Dict):
+        """Queues every part that `state` already holds and nothing has been streamed for."""
+        for kind, queue in self._queues.items():
+            if kind in self._started or kind in self._ended or not state.get(kind):
+                continue
+            for sentence in split_sentences(state[kind]):
+                queue.put_nowait(sentence)
+            queue.put_nowait(None)
+            self._ended.add(kind)
+
+    def close(self, state: Optional[Dict] = None):
+        """Ends both parts, e.g. when the graph run stopped early.
+
+        Parts that got no sentences are first taken from `state`, the graph's
+        final values.
+        """
+        if state:
+            self.fill(state)
+        for kind, queue in self._queues.items():
+            if kind not in self._ended:
+                queue.put_nowait(None)
+                self._ended.add(kind)
+
+    async def _drain(self, key: str) -> AsyncIterator[str]:
+        queue = self._queues[key]
+        while True:
+            sentence = await queue.get()
+            if sentence is None:
+                return
+            yield sentence
+
+    async def sentences(self) -> AsyncIterator[str]:
+        """Yields the full presentation script, sentence by sentence."""
+        intro = PRESENTATION_INTRO
+        async for sentence in self._drain("summary"):
+            # Hold the intro back so the first audio already carries content
+            yield f"{intro} {sentence}" if intro else sentence
+            intro = None
+        yield PRESENTATION_ITINERARY_HEADING
+        async for sentence in self._drain("itinerary"):
+            yield sentence
+        yield PRESENTATION_CLOSING
+
+    async def script(self) -> AsyncIterator[str]:
+        """The presentation as TTS input for session.say()."""
+        async for sentence in self.sentences():
+            yield sentence + " "
+
+async def open_checkpointer(path: str = CHECKPOINT_DB) -> AsyncSqliteSaver:
+    """Opens the conversation checkpoint store; close it with `checkpointer.conn.close()`."""
+    # Several worker processes read and write the same file; with many calls
+    # per host, checkpoint writes can queue behind each other for a while
+    conn = await aiosqlite.connect(path, timeout=30)
+    await conn.execute("PRAGMA journal_mode=WAL")
+    await conn.execute("PRAGMA synchronous=NORMAL")
+    checkpointer = AsyncSqliteSaver(conn)
+    await checkpointer.setup()
+    return checkpointer
+
+# Nodes a collection step can continue to
+COLLECTION_ROUTES = [*SLOT_STEPS.values(), "flight_search", "hotel_search"]
+
+def new_travel_state() -> TravelState:
+    """Fresh per-session state."""
+    return TravelState(
+        budget=None,
+        activities=[],
+        preference=None,
+        flight_options=[],
+        hotel_options=[],
+        itinerary=None,
+        summary=None,
+        current_step="greeting",
+        user_message=None,
+        agent_response=None,
+        fast_path_hits=0,
+        llm_extractions=0
+    )
+
+class TravelPlanningWorkflow:
+    """The LangGraph nodes and compiled graph.
+
+    Nodes only read and return TravelState, so a single instance (and its
+    compiled graph) is built once per worker process and shared by every
+    session; see get_workflow(). Conversation state lives in a checkpointer
+    attached per session with with_checkpointer().
+    """
 
-class TravelPlanningAgent(Agent):
     def __init__(self) -> None:
-        super().__init__(
-            instructions="""You are a helpful AI travel planning assistant. 
-            You will help users plan their perfect trip by gathering information about their budget, 
-            preferred activities, and travel style, then create a personalized travel plan.
-            
-            Be conversational, friendly, and helpful. Ask one question at a time and wait for responses.
-            """
-        )
-        self.travel_state = TravelState(
-            budget=None,
-            activities=[],
-            preference=None,
-            flight_options=[],
-            hotel_options=[],
-            itinerary=None,
-            summary=None,
-            current_step="greeting",
-            user_message=None,
-            agent_response=None
-        )
         self.graph = self.create_graph()
 
+    def with_checkpointer(self, checkpointer):
+        """The compiled graph, persisting its state through `checkpointer`."""
+        return self.graph.copy(update={"checkpointer": checkpointer})
+
     def create_graph(self):
         """Creates the LangGraph workflow for voice travel planning."""
         builder = StateGraph(TravelState)
@@ -80,178 +402,139 @@ class TravelPlanningAgent(Agent):
         # Define conditional flow
         builder.set_entry_point("greeting")
         builder.add_edge("greeting", "budget_collection")
-        builder.add_edge("budget_collection", "activities_collection")
-        builder.add_edge("activities_collection", "preference_collection")
-        builder.add_edge("preference_collection", "flight_search")
-        builder.add_edge("flight_search", "hotel_search")
-        builder.add_edge("hotel_search", "itinerary_generator")
-        builder.add_edge("itinerary_generator", "summary")
-        builder.add_edge("summary", "final_presentation")
+        # Collection nodes wait for the caller's answer, then go to whichever
+        # slot is still missing, or start planning once all are filled
+        for node in SLOT_STEPS.values():
+            builder.add_conditional_edges(node, self.route_collection, COLLECTION_ROUTES)
+        # Flight and hotel search are instant local lookups; the summary and
+        # itinerary LLM calls then run in parallel and join for the presentation
+        builder.add_edge(["flight_search", "hotel_search"], "summary")
+        builder.add_edge(["flight_search", "hotel_search"], "itinerary_generator")
+        builder.add_edge(["summary", "itinerary_generator"], "final_presentation")
         builder.add_edge("final_presentation", END)
 
         return builder.compile()
 
     def greeting_agent(self, state: TravelState):
         """Initial greeting and introduction."""
-        response = """Hello! I'm your AI travel planning assistant. I'm excited to help you plan your perfect trip! 
-        
-        I'll need to gather some information about your preferences to create a personalized travel plan for you. 
-        
-        Let's start with your budget. What's your total budget for this trip?"""
-        
         return {
             "current_step": "budget_collection",
-            "agent_response": response
+            "agent_response": GREETING
         }
 
-    def budget_collection_agent(self, state: TravelState):
+    def route_collection(self, state: TravelState):
+        """Next node after a collection step."""
+        if state["current_step"] == "processing":
+            return ["flight_search", "hotel_search"]
+        return state["current_step"]
+
+    async def budget_collection_agent(self, state: TravelState):
         """Collects and validates budget information."""
-        user_input = state.get("user_message", "")
-        
-        # Try to extract budget from user input
-        llm = get_llm()
-        prompt = f"""
-        The user said: "{user_input}" when asked about their travel budget.
-        
-        Extract the budget amount if mentioned. If they gave a number, return just the number.
-        If they asked a question or need clarification, provide a helpful response and ask for their budget again.
-        If unclear, ask them to specify their budget in dollars.
-        
-        Format your response as either:
-        BUDGET: [number] (if you found a budget)
-        RESPONSE: [your response] (if you need to ask again)
-        """
-        
-        try:
-            response = llm.invoke(prompt)
-            content = response.content.strip()
-            
-            if content.startswith("BUDGET:"):
-                budget_str = content.replace("BUDGET:", "").strip()
-                try:
-                    budget = int(budget_str)
-                    return {
-                        "budget": budget,
-                        "current_step": "activities_collection",
-                        "agent_response": f"Perfect! ${budget} is a great budget to work with. Now, what activities do you enjoy when traveling? For example, museums, hiking, beaches, food tours, nightlife, or shopping?"
-                    }
-                except ValueError:
-                    pass
-            
-            # If we couldn't extract a budget, ask again
-            return {
-                "current_step": "budget_collection",
-                "agent_response": content.replace("RESPONSE:", "").strip() if content.startswith("RESPONSE:") else "I'd like to understand your budget better. Could you tell me how much you're planning to spend on this trip in dollars?"
-            }
-            
-        except Exception as e:
-            return {
-                "current_step": "budget_collection",
-                "agent_response": "I'd love to help you plan your trip! Could you tell me your total budget for this trip?"
-            }
+        return await self.collect_slots(state, "budget")
 
-    def activities_collection_agent(self, state: TravelState):
+    async def activities_collection_agent(self, state: TravelState):
         """Collects preferred activities."""
-        user_input = state.get("user_message", "")
-        
-        llm = get_llm()
-        prompt = f"""
-        The user said: "{user_input}" when asked about their preferred travel activities.
-        
-        Extract the activities they mentioned and provide an encouraging response.
-        If they seem unsure, suggest some popular activities.
-        
-        Format as: ACTIVITIES: [activity1, activity2, ...] | RESPONSE: [your response]
-        """
-        
-        try:
-            response = llm.invoke(prompt)
-            content = response.content.strip()
-            
-            # Extract activities
-            activities = []
-            if "ACTIVITIES:" in content:
-                activities_part = content.split("ACTIVITIES:")[1].split("|")[0].strip()
-                activities = [act.strip() for act in activities_part.split(",")]
-            
-            # Get response
-            response_part = content.split("RESPONSE:")[1].strip() if "RESPONSE:" in content else "Great choices!"
-            
-            return {
-                "activities": activities,
-                "current_step": "preference_collection",
-                "agent_response": f"{response_part} Now, do you prefer luxury experiences with premium accommodations and services, or are you more budget-conscious looking for good value options?"
-            }
-            
-        except Exception as e:
-            return {
-                "current_step": "activities_collection",
-                "agent_response": "What kind of activities do you enjoy? For example: sightseeing, adventure sports, cultural experiences, food and dining, or relaxation?"
-            }
+        return await self.collect_slots(state, "activities")
 
-    def preference_collection_agent(self, state: TravelState):
+    async def preference_collection_agent(self, state: TravelState):
         """Collects travel style preference."""
-        user_input = state.get("user_message", "")
+        return await self.collect_slots(state, "preference")
+
+    async def collect_slots(self, state: TravelState, asked: str):
+        """Fills every slot the caller mentioned, whichever question was asked.
+
+        Callers often answer everything at once ("3k, museums and food,
+        nothing fancy"), so budget, activities and preference are all
+        extracted from each utterance and only the slots still missing are
+        asked for afterwards.
         
-        llm = get_llm()
-        prompt = f"""
-        The user said: "{user_input}" when asked about luxury vs budget travel preferences.
+        The node pauses at an interrupt until the caller's answer is resumed
+        into it with Command(resume=...).
+        """
+        user_input = interrupt(state.get("agent_response")) or ""
+        missing = [slot for slot in SLOT_ORDER if not state.get(slot)]
         
-        Determine if they prefer "luxury" or "economy" based on their response.
+        # Plain answers like "about 2000 dollars" don't need an LLM round trip
+        found = extract_slots(user_input, missing, asked)
+        reply = None
+        if asked in found or asked not in missing:
+            counts = self._count_extraction(state, fast_path=True)
+        else:
+            counts = self._count_extraction(state, fast_path=False)
+            node = SLOT_STEPS[asked]
+            prompt = slot_extraction_prompt(user_input, missing, asked)
+            try:
+                with timed("llm", node=node):
+                    slots = await llm_deadlines.call(node, lambda: get_slot_extractor().ainvoke(prompt))
+                found.update({
+                    slot: value
+                    for slot, value in slots.model_dump().items()
+                    if slot in missing and value and slot not in found
+                })
+                reply = slots.reply
+            except Exception as e:
+                # Falls back to what the local extractor found, or asking again
+                logger.warning("slot extraction failed: %s", e)
+                llm_deadlines.record_fallback(node)
         
-        Format as: PREFERENCE: [luxury/economy] | RESPONSE: [acknowledgment]
-        """
+        filled = {**{slot: state.get(slot) for slot in SLOT_ORDER}, **found}
+        still_missing = [slot for slot in SLOT_ORDER if not filled.get(slot)]
         
-        try:
-            response = llm.invoke(prompt)
-            content = response.content.strip()
-            
-            preference = "economy"  # default
-            if "PREFERENCE:" in content:
-                pref_part = content.split("PREFERENCE:")[1].split("|")[0].strip().lower()
-                if "luxury" in pref_part:
-                    preference = "luxury"
-            
+        if not still_missing:
             return {
-                "preference": preference,
+                **found,
                 "current_step": "processing",
-                "agent_response": "Perfect! I have all the information I need. Let me create your personalized travel plan. This will take just a moment..."
+                "user_message": user_input,
+                "agent_response": PLANNING_ACKNOWLEDGMENT,
+                **counts
             }
-            
-        except Exception as e:
+        
+        next_slot = still_missing[0]
+        if not found:
+            # Nothing usable in this answer, so answer the caller or ask again
             return {
-                "current_step": "preference_collection",
-                "agent_response": "Would you prefer luxury accommodations and experiences, or are you looking for more budget-friendly options?"
+                "current_step": SLOT_STEPS[next_slot],
+                "user_message": user_input,
+                "agent_response": reply or SLOT_REASK[next_slot],
+                **counts
             }
+        
+        acknowledgment = []
+        if "budget" in found:
+            acknowledgment.append(f"Perfect! ${found['budget']} is a great budget to work with.")
+        if "activities" in found:
+            acknowledgment.append("Great choices!")
+        if "preference" in found:
+            acknowledgment.append(f"{found['preference'].capitalize()} it is!")
+        acknowledgment.append(SLOT_QUESTIONS[next_slot])
+        return {
+            **found,
+            "current_step": SLOT_STEPS[next_slot],
+            "user_message": user_input,
+            "agent_response": " ".join(acknowledgment),
+            **counts
+        }
+
+    def _count_extraction(self, state: TravelState, fast_path: bool) -> Dict[str, int]:
+        """Records whether a slot came from the fast path or needed the LLM."""
+        record_fast_path(fast_path)
+        if fast_path:
+            return {"fast_path_hits": state.get("fast_path_hits", 0) + 1}
+        return {"llm_extractions": state.get("llm_extractions", 0) + 1}
 
-    def flight_search_agent(self, state: TravelState):
+    async def flight_search_agent(self, state: TravelState):
         """Generates flight options based on preferences."""
-        llm = get_llm()
-        
-        prompt = f"""
-        Generate 2-3 realistic flight options for a trip with:
-        - Budget: ${state['budget']}
-        - Preference: {state['preference']}
-        
-        Provide airline names, prices, and durations that fit the budget and preference.
-        """
-        
-        try:
-            response = llm.invoke(prompt)
-            # Create structured flight options
-            base_price = min(400, state['budget'] // 3) if state['preference'] == 'economy' else min(600, state['budget'] // 2)
-            flight_options = [
-                {"airline": "Budget Airways", "price": base_price, "duration": "8 hours"},
-                {"airline": "Premium Airlines", "price": base_price + 200, "duration": "6 hours"},
-            ]
-        except Exception as e:
-            flight_options = [
-                {"airline": "Standard Airlines", "price": 500, "duration": "7 hours"}
-            ]
+        # Options are derived from the budget directly; asking the LLM here only
+        # added latency because its answer was never used
+        base_price = min(400, state['budget'] // 3) if state['preference'] == 'economy' else min(600, state['budget'] // 2)
+        flight_options = [
+            {"airline": "Budget Airways", "price": base_price, "duration": "8 hours"},
+            {"airline": "Premium Airlines", "price": base_price + 200, "duration": "6 hours"},
+        ]
         
         return {"flight_options": flight_options}
 
-    def hotel_search_agent(self, state: TravelState):
+    async def hotel_search_agent(self, state: TravelState):
         """Generates hotel options based on preferences."""
         base_price = 80 if state['preference'] == 'economy' else 200
         hotel_options = [
@@ -261,133 +544,532 @@ class TravelPlanningAgent(Agent):
         
         return {"hotel_options": hotel_options}
 
-    def itinerary_generator_agent(self, state: TravelState):
+    async def itinerary_generator_agent(self, state: TravelState):
         """Generates personalized itinerary."""
-        llm = get_llm()
-        
-        prompt = f"""
-        Create a concise 3-day travel itinerary for:
-        - Budget: ${state['budget']}
-        - Activities: {', '.join(state['activities'])}
-        - Style: {state['preference']}
-        
-        Keep it brief but engaging. Include specific attractions and activities.
-        Format as Day 1, Day 2, Day 3.
-        """
-        
-        try:
-            response = llm.invoke(prompt)
-            itinerary = response.content
-        except Exception as e:
-            itinerary = "Day 1: City exploration and local cuisine\nDay 2: Main attractions and cultural sites\nDay 3: Leisure activities and shopping"
-        
+        itinerary = await self.generate_plan_text("itinerary", state, itinerary_prompt(state), fallback_itinerary(state),
+                                                  node="itinerary_generator")
         return {"itinerary": itinerary}
 
-    def summary_agent(self, state: TravelState):
+    async def summary_agent(self, state: TravelState):
         """Creates travel plan summary."""
-        llm = get_llm()
+        summary = await self.generate_plan_text("summary", state, summary_prompt(state), fallback_summary(state),
+                                                node="summary", prices=summary_prices(state))
+        return {"summary": summary}
+
+    async def generate_plan_text(self, kind: str, state: TravelState, prompt: str, fallback: str, node: str,
+                                 prices: Tuple[int, ...] = ()) -> str:
+        """Cached LLM generation that streams its sentences out of the graph.
+
+        Sentences are written to the "custom" stream as {"plan": kind,
+        "sentence": ...}, ending with a None sentence. If the same plan is
+        already being generated (e.g. speculatively), that run is awaited
+        instead of starting another. Only actual generations are timed as
+        `node`'s LLM latency.
+
+        Generation is held to the node's latency budget (llm_deadlines.py);
+        past it, the caller gets whatever was already streamed or `fallback`.
+        `prices` quoted in the prompt are part of the cache key.
+        """
+        writer = plan_stream_writer()
+        emitted: List[str] = []
+        node_started = time.perf_counter()
         
-        prompt = f"""
-        Create a brief travel summary highlighting:
-        - Budget: ${state['budget']}
-        - Best flight option: {state['flight_options'][0] if state['flight_options'] else 'Standard option'}
-        - Recommended hotel: {state['hotel_options'][0] if state['hotel_options'] else 'Standard hotel'}
-        - Key highlights from the itinerary
+        def emit(sentence: str):
+            emitted.append(sentence)
+            writer({"plan": kind, "sentence": sentence})
         
-        Keep it concise and exciting.
-        """
+        async def generate() -> str:
+            # Time spent waiting on a joined generation that then failed counts against the budget
+            waited = time.perf_counter() - node_started
+            with timed("llm", node=node):
+                if not STREAM_PRESENTATION:
+                    response = await llm_deadlines.call(node, lambda: get_llm().ainvoke(prompt), waited)
+                    return response.content
+                sentences = llm_deadlines.stream(node, lambda: stream_sentences(stream_llm_text(prompt)), waited)
+                async for sentence in sentences:
+                    emit(sentence)
+                return "\n".join(emitted)
         
+        cache_key = plan_key(state['budget'], state['activities'], state['preference'], prices=prices)
         try:
-            response = llm.invoke(prompt)
-            summary = response.content
+            text = await plan_cache.get_or_generate(kind, cache_key, state['budget'], generate)
         except Exception as e:
-            summary = f"Your ${state['budget']} travel plan includes flights, accommodation, and activities tailored to your {state['preference']} preferences."
+            logger.warning("%s generation failed: %s", kind, e)
+            text = "\n".join(emitted)
+        if not text:
+            llm_deadlines.record_fallback(node)
+            text = fallback
         
-        return {"summary": summary}
+        if not emitted:
+            # Cached, joined or non-streamed text is emitted in one go
+            async for sentence in stream_sentences(_aiter([text])):
+                emit(sentence)
+        writer({"plan": kind, "sentence": None})
+        return text
 
     def final_presentation_agent(self, state: TravelState):
         """Presents the final travel plan."""
-        response = f"""Here's your personalized travel plan!
+        response = f"""{PRESENTATION_INTRO}
 
         {state['summary']}
 
-        Your 3-day itinerary:
+        {PRESENTATION_ITINERARY_HEADING}
         {state['itinerary']}
 
-        I hope you have an amazing trip! Is there anything specific you'd like me to adjust or explain further about your travel plan?"""
+        {PRESENTATION_CLOSING}"""
         
         return {
             "current_step": "complete",
             "agent_response": response
         }
 
+def watch_time_to_speech(session: AgentSession, started: float, label: str, record=None, kind: Optional[str] = None,
+                          level: int = logging.INFO):
+    """Logs how long after `started` the agent next starts playing audio.
+
+    With `kind`, the time is also observed as a reply_audio latency.
+    Returns a function that stops watching, e.g. when nothing was spoken.
+    """
+    def on_state_changed(ev):
+        if getattr(ev, "new_state", None) != "speaking":
+            return
+        session.off("agent_state_changed", on_state_changed)
+        seconds = time.perf_counter() - started
+        logger.log(level, "%s %.2fs", label, seconds)
+        if kind is not None:
+            observe("reply_audio", seconds, kind=kind)
+        if record is not None:
+            record(seconds)
+    session.on("agent_state_changed", on_state_changed)
+    return lambda: session.off("agent_state_changed", on_state_changed)
+
+async def generate_reply(session: AgentSession, instructions: str):
+    """session.generate_reply(), timing how long it takes to produce audio."""
+    stop_watching = watch_time_to_speech(session, time.perf_counter(), "reply audio", kind="reply", level=logging.DEBUG)
+    try:
+        await session.generate_reply(instructions=instructions)
+    finally:
+        # Interrupted before it spoke: don't attribute a later reply's audio to it
+        stop_watching()
+
+audio_cache: Optional[AudioCache] = AudioCache(TTS_VOICE, TTS_MODEL) if AUDIO_CACHE else None
+
+async def speak(session: AgentSession, text: str, verbatim: bool = False, kind: Optional[str] = "reply"):
+    """Says `text`, playing the fixed prompts in it from the audio cache.
+
+    The rest of the text is said as written. Text without a fixed prompt
+    goes through generate_reply() unless `verbatim`; `kind` is passed to
+    watch_time_to_speech() (None when the caller already watches).
+    """
+    parts = split_known(text, FIXED_PROMPTS) if audio_cache is not None and session.tts is not None else []
+    if not any(fixed for _, fixed in parts):
+        if verbatim:
+            await session.say(text)
+        else:
+            await generate_reply(session, text)
+        return
+    stop_watching = None
+    if kind is not None:
+        stop_watching = watch_time_to_speech(session, time.perf_counter(), "reply audio", kind=kind, level=logging.DEBUG)
+    try:
+        for part, fixed in parts:
+            if fixed:
+                await session.say(part, audio=audio_cache.speech(part, session.tts))
+            else:
+                await session.say(part)
+    finally:
+        if stop_watching is not None:
+            stop_watching()
+
+_workflow: Optional[TravelPlanningWorkflow] = None
+
+def get_workflow() -> TravelPlanningWorkflow:
+    """Returns the process-wide workflow, compiling the graph on first use."""
+    global _workflow
+    if _workflow is None:
+        _workflow = TravelPlanningWorkflow()
+    return _workflow
+
+class TravelPlanningAgent(Agent):
+    def __init__(self, workflow: Optional[TravelPlanningWorkflow] = None, room_name: Optional[str] = None) -> None:
+        super().__init__(
+            instructions="""You are a helpful AI travel planning assistant. 
+            You will help users plan their perfect trip by gathering information about their budget, 
+            preferred activities, and travel style, then create a personalized travel plan.
+            
+            Be conversational, friendly, and helpful. Ask one question at a time and wait for responses.
+            """
+        )
+        # The compiled graph is shared process-wide; the conversation itself
+        # is checkpointed under the room name once start_conversation() runs
+        self.workflow = workflow or get_workflow()
+        self.graph = self.workflow.graph
+        self.config = {"configurable": {"thread_id": room_name or f"travel-planning-{uuid.uuid4().hex}"}}
+        # Local mirror of the checkpointed state, for logging and speculation
+        self.travel_state = new_travel_state()
+        # Wall-clock time of the last planning stage, in seconds
+        self.planning_seconds: Optional[float] = None
+        # Time from the preference answer until the plan started playing, in seconds
+        self.time_to_first_audio: Optional[float] = None
+        # Background plan generation per preference, started before the preference is known
+        self._speculative: Dict[str, asyncio.Task] = {}
+        # Set once the current turn has checkpointed its result
+        self.turn_committed = False
+        # Set while the plan is being presented, until it has been spoken in full
+        self.plan_pending = False
+
+    async def start_conversation(self, checkpointer) -> str:
+        """Starts or resumes this room's conversation and returns what to say first."""
+        self.graph = self.workflow.with_checkpointer(checkpointer)
+        snapshot = await self.graph.aget_state(self.config)
+        if not snapshot.values:
+            # New call: run the greeting up to the first question
+            async for update in self.graph.astream(new_travel_state(), self.config, stream_mode="updates"):
+                self._apply(update)
+            return self.travel_state["agent_response"]
+        
+        self.travel_state.update(snapshot.values)
+        logger.info("resuming conversation %s at %s", self.config["configurable"]["thread_id"], self.travel_state["current_step"])
+        if any(task.interrupts for task in snapshot.tasks):
+            return f"{RESUME_GREETING} {self.travel_state['agent_response']}"
+        if snapshot.next:
+            return f"{RESUME_GREETING} {RESUME_PLANNING}"
+        return f"{RESUME_GREETING} {RESUME_COMPLETE}"
+
+    def _apply(self, update: Dict) -> List[Tuple[str, Dict]]:
+        """Mirrors a graph "updates" chunk into travel_state and returns the node updates."""
+        applied = []
+        for node, values in update.items():
+            if node == "__interrupt__" or not values:
+                continue
+            self.travel_state.update(values)
+            applied.append((node, values))
+        return applied
+
+    def start_speculation(self, state: TravelState):
+        """Generates plans for the likely preferences while the preference question is asked."""
+        if SPECULATIVE_PLANNING == "0" or self._speculative or not plan_cache.enabled:
+            return
+        if not state.get("budget") or not state.get("activities") or state.get("preference"):
+            return
+        if SPECULATIVE_PLANNING == "likely":
+            preferences = ["luxury" if state["budget"] >= SPECULATIVE_LUXURY_BUDGET else "economy"]
+        else:
+            preferences = ["luxury", "economy"]
+        for preference in preferences:
+            self._speculative[preference] = asyncio.create_task(self._speculate({**state, "preference": preference}))
+
+    async def _speculate(self, state: TravelState):
+        # The planning nodes join these generations or find them in the plan cache
+        flights, hotels = await asyncio.gather(self.workflow.flight_search_agent(state), self.workflow.hotel_search_agent(state))
+        state = {**state, **flights, **hotels}
+        await asyncio.gather(self.workflow.itinerary_generator_agent(state), self.workflow.summary_agent(state))
+
+    def take_speculation(self, preference: Optional[str]) -> Optional[asyncio.Task]:
+        """Returns the speculative task matching the answer and cancels the others."""
+        match = self._speculative.pop(preference, None)
+        for task in self._speculative.values():
+            task.cancel()
+        self._speculative.clear()
+        if match is not None:
+            logger.info("using speculative %s plan (%s)", preference, "ready" if match.done() else "in progress")
+        return match
+
+    async def present_plan(self, acknowledgment: Optional[str], presentation: PlanPresentation, session: AgentSession, turn_started: float):
+        """Speaks the planning acknowledgment, then the plan as its sentences arrive."""
+        if acknowledgment:
+            await speak(session, acknowledgment)
+        self._watch_first_audio(session, turn_started)
+        if STREAM_PRESENTATION:
+            # Each sentence goes to TTS as soon as the LLM has finished it
+            await session.say(presentation.script())
+
+    def _watch_first_audio(self, session: AgentSession, turn_started: float):
+        """Logs the time from the user's answer until the agent starts speaking the plan."""
+        def record(seconds: float):
+            self.time_to_first_audio = seconds
+        watch_time_to_speech(session, turn_started, "time to first plan audio", record, kind="plan")
+
     async def process_user_input(self, message: str, session: AgentSession):
         """Process user input through the LangGraph workflow."""
-        # Update state with user message
-        self.travel_state["user_message"] = message
-        
-        # Run the appropriate step based on current state
-        current_step = self.travel_state.get("current_step", "greeting")
+        turn_started = time.perf_counter()
+        outcome = "error"
+        try:
+            await self._run_turn(message, session, turn_started)
+            outcome = "ok"
+        except asyncio.CancelledError:
+            # Superseded by the caller speaking again
+            outcome = "cancelled"
+            raise
+        finally:
+            observe("turn", time.perf_counter() - turn_started, outcome=outcome)
+
+    async def _run_turn(self, message: str, session: AgentSession, turn_started: float):
+        self.turn_committed = False
         
-        if current_step == "greeting":
-            result = self.greeting_agent(self.travel_state)
-        elif current_step == "budget_collection":
-            result = self.budget_collection_agent(self.travel_state)
-        elif current_step == "activities_collection":
-            result = self.activities_collection_agent(self.travel_state)
-        elif current_step == "preference_collection":
-            result = self.preference_collection_agent(self.travel_state)
-        elif current_step == "processing":
-            # Run the full workflow for planning
-            result = self.flight_search_agent(self.travel_state)
-            self.travel_state.update(result)
-            result = self.hotel_search_agent(self.travel_state)
-            self.travel_state.update(result)
-            result = self.itinerary_generator_agent(self.travel_state)
-            self.travel_state.update(result)
-            result = self.summary_agent(self.travel_state)
-            self.travel_state.update(result)
-            result = self.final_presentation_agent(self.travel_state)
+        snapshot = await self.graph.aget_state(self.config)
+        if any(task.interrupts for task in snapshot.tasks):
+            # A collection step is waiting for this answer
+            graph_input = Command(resume=message)
+        elif snapshot.next:
+            # Planning was cut off (barge-in or dropped call); finish it
+            graph_input = None
+        elif self.plan_pending:
+            # The caller spoke over the plan before it was finished; present it again
+            self.turn_committed = True
+            await self.replay_plan(snapshot.values, session, turn_started)
+            return
         else:
-            result = {"agent_response": "Thank you for using our travel planning service! Feel free to ask if you need any adjustments to your plan."}
+            self.turn_committed = True
+            await speak(session, COMPLETED_REPLY)
+            return
         
-        # Update state
-        self.travel_state.update(result)
-        
-        # Send response
-        if result.get("agent_response"):
-            await session.generate_reply(instructions=result["agent_response"])
+        presentation = PlanPresentation()
+        presenting: Optional[asyncio.Task] = None
+        replies: List[str] = []
+        planning_started = turn_started
+        if graph_input is None:
+            # Summary or itinerary saved before the run was cut off are not streamed again
+            presentation.fill(snapshot.values)
+            self.plan_pending = True
+            presenting = asyncio.create_task(self.present_plan(None, presentation, session, turn_started))
+        try:
+            async for mode, chunk in self.graph.astream(graph_input, self.config, stream_mode=["updates", "custom"]):
+                if mode == "custom":
+                    presentation.feed(chunk)
+                    continue
+                for node, update in self._apply(chunk):
+                    # Every node update is checkpointed before it is streamed
+                    self.turn_committed = True
+                    if node in SLOT_STEPS.values() and update.get("current_step") == "processing":
+                        logger.info(
+                            "slot extraction: %d fast-path hits, %d LLM round trips (process hit rate %.0f%%)",
+                            self.travel_state.get("fast_path_hits", 0),
+                            self.travel_state.get("llm_extractions", 0),
+                            fast_path_hit_rate() * 100,
+                        )
+                        self.take_speculation(self.travel_state.get("preference"))
+                        # Acknowledge while the planning nodes run
+                        planning_started = time.perf_counter()
+                        self.plan_pending = True
+                        presenting = asyncio.create_task(
+                            self.present_plan(update["agent_response"], presentation, session, turn_started)
+                        )
+                    elif node in SLOT_STEPS.values():
+                        replies.append(update["agent_response"])
+                    elif node == "final_presentation":
+                        self.planning_seconds = time.perf_counter() - planning_started
+                        logger.info("planning stage took %.2fs (plan cache %s, LLM deadlines %s)",
+                                    self.planning_seconds, plan_cache.stats(), llm_deadlines.stats())
+                        if not STREAM_PRESENTATION:
+                            replies.append(update["agent_response"])
+            if presenting is not None:
+                # Cached or resumed nodes may have finished without streaming their sentences
+                presentation.close((await self.graph.aget_state(self.config)).values)
+            presentation.close()
+            
+            if presenting is None:
+                # Budget and activities are known one turn before the preference
+                self.start_speculation(dict(self.travel_state))
+            else:
+                await presenting
+            for reply in replies:
+                await speak(session, reply)
+            if presenting is not None:
+                self.plan_pending = False
+        finally:
+            presentation.close()
+            if presenting is not None:
+                presenting.cancel()
+
+    async def replay_plan(self, state: Dict, session: AgentSession, turn_started: float):
+        """Presents the finished plan from the checkpointed state."""
+        if STREAM_PRESENTATION:
+            presentation = PlanPresentation()
+            presentation.close(state)
+            await self.present_plan(None, presentation, session, turn_started)
+        else:
+            await speak(session, state["agent_response"])
+        self.plan_pending = False
+
+# Acknowledgments that ask for nothing; they don't interrupt the plan being read out
+BACKCHANNEL_WORDS = {
+    "ah", "alright", "cool", "got", "great", "hmm", "huh", "i", "it", "mhm", "mm", "mmhmm", "nice", "oh",
+    "ok", "okay", "perfect", "right", "see", "sure", "thank", "thanks", "uh", "uhhuh", "wow", "yeah", "yep",
+    "yes", "you",
+}
+
+def is_backchannel(text: str) -> bool:
+    """True for short listener responses like "uh-huh", "okay" or "got it"."""
+    words = re.findall(r"[a-z]+", text.lower().replace("-", ""))
+    return 0 < len(words) <= 4 and all(word in BACKCHANNEL_WORDS for word in words)
+
+class TurnScheduler:
+    """Runs one session's turns one at a time.
+
+    Utterances that arrive within TURN_COALESCE_SECONDS of each other are
+    merged into a single turn. When the caller speaks while a turn is still
+    running, that turn is stale: its LLM work is cancelled, its speech is
+    interrupted and, if it had not yet updated the travel state, its text is
+    folded into the next turn. Backchannels ("uh-huh", "okay") while the plan
+    is being presented are ignored instead.
+    """
+
+    def __init__(self, agent: TravelPlanningAgent, session: AgentSession, window: float = TURN_COALESCE_SECONDS):
+        self.agent = agent
+        self.session = session
+        self.window = window
+        self.cancelled_turns = 0
+        self._pending: List[str] = []
+        self._arrived = asyncio.Event()
+        self._turn: Optional[asyncio.Task] = None
+        self._turn_text = ""
+        self._runner = asyncio.create_task(self._run())
+
+    def submit(self, text: str):
+        text = (text or "").strip()
+        if not text:
+            return
+        if self._turn is not None and not self._turn.done():
+            if self.agent.plan_pending and is_backchannel(text):
+                logger.debug("backchannel during the plan, not interrupting: %r", text)
+                return
+            self._pending.append(text)
+            self._cancel_turn()
+        else:
+            self._pending.append(text)
+        self._arrived.set()
+
+    def _cancel_turn(self):
+        self.cancelled_turns += 1
+        self._turn.cancel()
+        try:
+            self.session.interrupt()
+        except Exception as e:
+            logger.debug("interrupt failed: %s", e)
+        if not self.agent.turn_committed:
+            # The stale turn never used its text, so answer it together with the new one
+            self._pending.insert(0, self._turn_text)
+
+    async def _run(self):
+        while True:
+            await self._arrived.wait()
+            # Keep collecting until the caller has been quiet for a full window
+            while True:
+                self._arrived.clear()
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), self.window)
+                except asyncio.TimeoutError:
+                    break
+            self._turn_text = " ".join(self._pending)
+            self._pending.clear()
+            self._turn = asyncio.create_task(self.agent.process_user_input(self._turn_text, self.session))
+            await asyncio.wait({self._turn})
+            if not self._turn.cancelled() and self._turn.exception() is not None:
+                logger.error("turn failed", exc_info=self._turn.exception())
+
+    async def aclose(self):
+        for task in (self._turn, self._runner):
+            if task is not None:
+                task.cancel()
+
+def create_tts(**kwargs) -> cartesia.TTS:
+    return cartesia.TTS(model=TTS_MODEL, voice=TTS_VOICE, **kwargs)
+
+def create_voice_plugins() -> Dict:
+    """STT, LLM, TTS and noise cancellation used by every session."""
+    return {
+        "stt": deepgram.STT(model="nova-3", language="multi"),
+        "llm": google.LLM(model="gemini-2.0-flash"),
+        "tts": create_tts(),
+        "noise_cancellation": noise_cancellation.BVCTelephony(),
+    }
+
+def prewarm(proc: agents.JobProcess):
+    """Loads plugins and compiles the graph once per worker process, before any job."""
+    started = time.perf_counter()
+    if AGENT_METRICS_DIR:
+        publish_metrics(AGENT_METRICS_DIR)
+    proc.userdata["workflow"] = get_workflow()
+    proc.userdata["plugins"] = create_voice_plugins()
+    if audio_cache is not None:
+        # Maps the cached prompts now so no call waits on opening them
+        sample_rate = proc.userdata["plugins"]["tts"].sample_rate
+        cached = sum(audio_cache.contains(prompt, sample_rate) for prompt in FIXED_PROMPTS)
+        if cached < len(FIXED_PROMPTS):
+            logger.info("audio cache has %d of %d fixed prompts; run audio_cache.py to synthesize the rest",
+                        cached, len(FIXED_PROMPTS))
+    # Builds the cached LLM client; the connection itself is opened by LLM_WARMUP
+    try:
+        get_llm()
+    except ValueError as e:
+        logger.warning("LLM client not prewarmed: %s", e)
+    logger.info("worker process prewarmed in %.2fs", time.perf_counter() - started)
 
 async def entrypoint(ctx: agents.JobContext):
     """Main entrypoint for the voice travel planning agent."""
+    job_started = time.perf_counter()
+    # Set before any of the job's tasks start, so everything they observe
+    # (LLM calls, turns, audio) also goes to the room's trace file
+    trace = start_trace(ctx.job.room.name)
+    if trace is not None:
+        async def close_trace():
+            trace.close()
+        ctx.add_shutdown_callback(close_trace)
+    prewarmed = "plugins" in ctx.proc.userdata
+    plugins = ctx.proc.userdata["plugins"] if prewarmed else create_voice_plugins()
+
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3", language="multi"),
-        llm=google.LLM(model="gemini-2.0-flash"),
-        tts=cartesia.TTS(model="sonic-2", voice="f786b574-daa5-4673-aa0c-cbe3e8534c02"),
+        stt=plugins["stt"],
+        llm=plugins["llm"],
+        tts=plugins["tts"],
     )
 
-    travel_agent = TravelPlanningAgent()
+    if LLM_WARMUP:
+        # Runs alongside session setup instead of delaying the greeting
+        asyncio.create_task(warm_llm())
+
+    travel_agent = TravelPlanningAgent(ctx.proc.userdata.get("workflow"), room_name=ctx.job.room.name)
+    checkpointer = await open_checkpointer()
+    opening = await travel_agent.start_conversation(checkpointer)
 
     await session.start(
         room=ctx.room,
         agent=travel_agent,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVCTelephony(),
+            noise_cancellation=plugins["noise_cancellation"],
             close_on_disconnect=False  # optional: keep session even if participant disconnects
         ),
     )
 
     await ctx.connect()
 
-    # Initial greeting
-    await session.generate_reply(
-        instructions="Hello! I'm your AI travel planning assistant. I'm excited to help you plan your perfect trip! Let's start with your budget. What's your total budget for this trip?"
-    )
+    # Handle user messages one turn at a time
+    turns = TurnScheduler(travel_agent, session)
+    ctx.add_shutdown_callback(turns.aclose)
+    ctx.add_shutdown_callback(checkpointer.conn.close)
 
-    # Handle user messages (sync callback scheduling async work)
     def on_user_speech(message):
-        asyncio.create_task(travel_agent.process_user_input(message.text, session))
+        turns.submit(message.text)
     session.on("user_speech_committed", on_user_speech)
 
+    # Initial greeting (or welcome back), spoken verbatim so it doesn't wait on an LLM round trip
+    watch_time_to_speech(session, job_started, f"job accept to greeting audio (prewarmed={prewarmed})", kind="greeting")
+    await speak(session, opening, verbatim=True, kind=None)
+
+def start_metrics_server():
+    """Serves the job processes' latency histograms on AGENT_METRICS_PORT."""
+    global AGENT_METRICS_DIR
+    if not AGENT_METRICS_PORT:
+        return
+    if not AGENT_METRICS_DIR:
+        # Job processes are started from this one and inherit the setting
+        AGENT_METRICS_DIR = os.environ["AGENT_METRICS_DIR"] = tempfile.mkdtemp(prefix="travel-agent-metrics-")
+    try:
+        serve_metrics(AGENT_METRICS_PORT, AGENT_METRICS_DIR)
+    except OSError as e:
+        logger.warning("metrics server not started on port %d: %s", AGENT_METRICS_PORT, e)
+
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    start_metrics_server()
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
@@ -0,0 +1,303 @@
+"""Per-stage latency histograms in the Prometheus text format.
+
+Hot paths call observe(stage, seconds, **labels) (or wrap a block in
+timed()). An observation is a bisect into a fixed bucket list plus three
+increments, so it is cheap enough for every LLM call, turn and dial.
+Events worth counting (e.g. hedged LLM requests) go through count().
+render_metrics() formats everything recorded in this process for a
+/metrics route.
+
+With METRICS_TRACE_DIR set, observations made while a call's trace is
+active (start_trace() / call_trace()) are also appended to
+<dir>/<room name>.jsonl, one JSON object per line, so a single slow call
+can be taken apart afterwards. The dialer and the agent write to the same
+file when they share the directory.
+
+LiveKit runs every agent job in its own process: job processes
+publish_metrics() into a shared directory and the worker's metrics server
+(serve_metrics()) adds them up.
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+METRICS_TRACE_DIR = os.getenv("METRICS_TRACE_DIR", "")
+# How often job processes write their histograms for the worker's /metrics
+METRICS_PUBLISH_SECONDS = float(os.getenv("METRICS_PUBLISH_SECONDS", "5"))
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRIC_PREFIX = "travel"
+
+# Bucket upper bounds in seconds, from local lookups up to a long ring
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Exposed as travel_<stage>_seconds
+STAGES = {
+    "llm": "LLM call latency per travel planning graph node.",
+    "turn": "End-to-end time of one caller turn (process_user_input).",
+    "reply_audio": "Time until the agent's audio started: from the start of a reply (kind=reply), "
+                   "from the caller's last answer (kind=plan) or from job accept (kind=greeting).",
+    "dial": "create_sip_participant latency, including ringing until the call was answered.",
+    "queue_wait": "Time a campaign number waited between becoming due and being dialed.",
+}
+
+# Exposed as travel_<name>_total
+COUNTERS = {
+    "llm_hedges": "Duplicate LLM requests sent because the first ran past the node's hedge threshold.",
+    "llm_hedge_wins": "Hedged LLM requests that answered before the original.",
+    "llm_timeouts": "LLM requests abandoned because the node's latency budget ran out.",
+    "llm_fallbacks": "Times a node used its deterministic fallback instead of an LLM answer.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Bucket counts, sum and count of one labelled series.
+
+    Counts are per bucket; they are made cumulative when rendered.
+    """
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        # One slot per bucket plus +Inf; each observation lands in exactly one
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class LatencyMetrics:
+    """Histograms keyed by stage and label values, plus counters."""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+
+    def observe(self, stage: str, seconds: float, labels: Dict[str, str]):
+        key = (stage, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    def count(self, name: str, amount: float, labels: Dict[str, str]):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def state(self) -> Dict[str, list]:
+        """JSON-serializable copy, for publishing to another process."""
+        return {
+            "histograms": [[stage, dict(labels), list(h.counts), h.sum, h.count]
+                           for (stage, labels), h in list(self.histograms.items())],
+            "counters": [[name, dict(labels), value] for (name, labels), value in list(self.counters.items())],
+        }
+
+    def merge(self, state: Dict[str, list]):
+        for name, labels, value in state.get("counters", []):
+            self.count(name, value, labels)
+        for stage, labels, counts, total, count in state.get("histograms", []):
+            key = (stage, tuple(sorted(labels.items())))
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            if len(counts) != len(histogram.counts):
+                # Published with other buckets; skip rather than misreport
+                continue
+            histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+            histogram.sum += total
+            histogram.count += count
+
+    def render(self) -> str:
+        lines: List[str] = []
+        by_stage: Dict[str, List[Tuple[Labels, Histogram]]] = {}
+        for (stage, labels), histogram in sorted(list(self.histograms.items())):
+            by_stage.setdefault(stage, []).append((labels, histogram))
+        for stage, series in by_stage.items():
+            name = f"{METRIC_PREFIX}_{stage}_seconds"
+            lines.append(f"# HELP {name} {STAGES.get(stage, stage)}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in series:
+                counts, cumulative = list(histogram.counts), 0
+                for bound, n in zip((*LATENCY_BUCKETS, "+Inf"), counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        by_name: Dict[str, List[Tuple[Labels, float]]] = {}
+        for (name, labels), value in sorted(list(self.counters.items())):
+            by_name.setdefault(name, []).append((labels, value))
+        for name, series in by_name.items():
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines.append(f"# HELP {metric} {COUNTERS.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in series:
+                lines.append(f"{metric}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Labels, le=None) -> str:
+    pairs = list(labels) + ([("le", le)] if le is not None else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CallTrace:
+    """Appends one call's observations to its trace file as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path: Optional[str] = path
+        self._file = None
+
+    def write(self, stage: str, seconds: float, labels: Dict[str, str]):
+        if self.path is None:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        # One write per line, flushed, so processes sharing the file don't interleave
+        self._file.write(json.dumps({"time": round(time.time(), 3), "stage": stage,
+                                     "seconds": round(seconds, 4), **labels}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self.path = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# Process-wide histograms, and the trace of the call the current task belongs to
+metrics = LatencyMetrics()
+_trace: ContextVar[Optional[CallTrace]] = ContextVar("call_trace", default=None)
+
+
+def observe(stage: str, seconds: float, **labels: str):
+    metrics.observe(stage, seconds, labels)
+    trace = _trace.get()
+    if trace is not None:
+        trace.write(stage, seconds, labels)
+
+
+def count(name: str, amount: float = 1, **labels: str):
+    metrics.count(name, amount, labels)
+
+
+@contextmanager
+def timed(stage: str, **labels: str) -> Iterator[None]:
+    """Observes how long the block took, whether or not it raised."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started, **labels)
+
+
+def start_trace(call_id: str) -> Optional[CallTrace]:
+    """Traces the current task, and tasks it starts from now on, into call_id's file.
+
+    None if tracing is off; close the returned trace when the call ends.
+    """
+    if not METRICS_TRACE_DIR:
+        return None
+    trace = CallTrace(os.path.join(METRICS_TRACE_DIR, f"{call_id}.jsonl"))
+    _trace.set(trace)
+    return trace
+
+
+@contextmanager
+def call_trace(call_id: str) -> Iterator[Optional[CallTrace]]:
+    """Traces observations made inside the block into call_id's file."""
+    if not METRICS_TRACE_DIR:
+        yield None
+        return
+    trace = CallTrace(os.path.join(METRICS_TRACE_DIR, f"{call_id}.jsonl"))
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+        trace.close()
+
+
+def render_metrics(directory: Optional[str] = None) -> str:
+    """This process's histograms, or the sum of those published to `directory`."""
+    if directory is None:
+        return metrics.render()
+    combined = LatencyMetrics()
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                combined.merge(json.load(f))
+        except (OSError, ValueError):
+            # Being replaced right now or unreadable; counted on the next scrape
+            continue
+    return combined.render()
+
+
+def publish_metrics(directory: str, interval: float = METRICS_PUBLISH_SECONDS):
+    """Writes this process's histograms to `directory` every `interval` seconds and at exit."""
+    path = os.path.join(directory, f"{os.getpid()}.json")
+
+    def write():
+        temp = f"{path}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(metrics.state(), f)
+        # Readers only ever see a complete file
+        os.replace(temp, path)
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                write()
+            except OSError:
+                pass
+
+    os.makedirs(directory, exist_ok=True)
+    threading.Thread(target=loop, name="metrics-publisher", daemon=True).start()
+    atexit.register(write)
+
+
+def serve_metrics(port: int, directory: Optional[str] = None) -> ThreadingHTTPServer:
+    """Serves render_metrics(directory) on :port/metrics from a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_metrics(directory).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes every few seconds would drown the worker's own logs
+            pass
+
+    server = ThreadingHTTPServer(("", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
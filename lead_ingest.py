@@ -0,0 +1,197 @@
+"""Streaming ingestion of uploaded lead lists.
+
+Uploads are read in chunks (gunzipped on the fly when gzip-compressed),
+decoded and parsed row by row, so memory stays flat no matter how large the
+export is, and numbers reach the dialer while the rest of the file is still
+being parsed.
+"""
+
+import asyncio
+import codecs
+import csv
+import os
+import re
+import zlib
+from typing import AsyncIterator, List, NamedTuple, Optional, Set
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", str(1024 * 1024)))
+
+PHONE_COLUMNS = {"phone", "phone_number", "phone number", "number"}
+# Optional per-number calling rules (see call_scheduling.py)
+TIMEZONE_COLUMNS = {"timezone", "time_zone", "tz"}
+WINDOW_COLUMNS = {"call_window", "calling_window", "window"}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_PHONE_FORMATTING = re.compile(r"[\s\-().]")
+
+
+def normalize_phone(n: str) -> str:
+    n = _PHONE_FORMATTING.sub("", n.strip())
+    if not n:
+        return n
+    return n if n.startswith("+") else "+" + n
+
+
+class Lead(NamedTuple):
+    phone: str
+    # IANA zone name, e.g. "America/New_York"
+    timezone: Optional[str] = None
+    # Local hours the number may be called, e.g. "09:00-17:00"
+    window: Optional[str] = None
+
+
+def phone_key(number: str):
+    """Compact key for a normalized number: an int for digits-only E.164
+    numbers (roughly half the memory of the str), else the number itself."""
+    digits = number[1:]
+    # The leading 1 keeps leading zeros significant
+    return int("1" + digits) if digits.isdigit() else number
+
+
+class PhoneSet:
+    """Set of seen phone numbers, keyed by phone_key()."""
+
+    def __init__(self):
+        self._numbers: Set = set()
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def add(self, number: str) -> bool:
+        """Adds a normalized number; returns False if it was already present."""
+        key = phone_key(number)
+        if key in self._numbers:
+            return False
+        self._numbers.add(key)
+        return True
+
+
+def _field(row: List[str], column: Optional[int]) -> Optional[str]:
+    if column is None or column >= len(row):
+        return None
+    return row[column].strip() or None
+
+
+async def read_chunks(file, chunk_size: int = INGEST_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Reads an UploadFile in chunks, decompressing gzip input transparently."""
+    decompressor = None
+    first = True
+    while True:
+        chunk = await file.read(chunk_size)
+        if first:
+            first = False
+            if chunk.startswith(_GZIP_MAGIC):
+                decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        if not chunk:
+            break
+        if decompressor is None:
+            yield chunk
+            continue
+        # Bound each decompressed chunk; gzip can expand a small chunk a lot
+        while chunk:
+            data = decompressor.decompress(chunk, chunk_size)
+            chunk = decompressor.unconsumed_tail
+            if data:
+                yield data
+    if decompressor is not None:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+
+async def read_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    """Parses CSV rows incrementally from byte chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="ignore")
+    buffer = ""
+    record = ""
+
+    def parse(lines: List[str]) -> List[List[str]]:
+        nonlocal record
+        complete = []
+        for line in lines:
+            record += line
+            # An odd number of quotes means a quoted field continues on the next line
+            if record.count('"') % 2 == 0:
+                complete.append(record)
+                record = ""
+        return list(csv.reader(complete))
+
+    async for chunk in chunks:
+        # Small uploads are read from memory without awaiting; let the dialer run
+        await asyncio.sleep(0)
+        *lines, buffer = (buffer + decoder.decode(chunk)).split("\n")
+        # The last piece may be cut off mid-row; it is kept for the next chunk
+        for row in parse([line + "\n" for line in lines]):
+            yield row
+
+    buffer += decoder.decode(b"", final=True)
+    rows = parse([buffer] if buffer else [])
+    if record:
+        # Unterminated quote at end of file; parse what there is
+        rows += list(csv.reader([record]))
+    for row in rows:
+        yield row
+
+
+class LeadReader:
+    """Async iterator over the unique, normalized phone numbers in an upload.
+
+    The phone column is taken from a header named phone, phone_number,
+    "phone number" or number; without one, the first column is used and a
+    header-like first row is skipped. Headed lists may also give each
+    number a timezone and call_window.
+    """
+
+    def __init__(self, file, chunk_size: int = INGEST_CHUNK_SIZE, suppression=None):
+        self.file = file
+        self.chunk_size = chunk_size
+        # Numbers in this (e.g. a SuppressionList) are left out
+        self.suppression = suppression
+        self.rows = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.suppressed = 0
+        self.skipped = 0
+        self._seen = PhoneSet()
+
+    async def __aiter__(self) -> AsyncIterator[Lead]:
+        column: Optional[int] = None
+        timezone_column = window_column = None
+        async for row in read_rows(read_chunks(self.file, self.chunk_size)):
+            if not row:
+                continue
+            if column is None:
+                column = 0
+                header = [field.strip().lower() for field in row]
+                matches = [i for i, name in enumerate(header) if name in PHONE_COLUMNS]
+                if matches:
+                    column = matches[0]
+                    timezone_column = next((i for i, name in enumerate(header) if name in TIMEZONE_COLUMNS), None)
+                    window_column = next((i for i, name in enumerate(header) if name in WINDOW_COLUMNS), None)
+                    continue
+                # Skip header-like first row if it contains non-digit content
+                if any(ch.isalpha() for ch in ",".join(row)):
+                    continue
+
+            self.rows += 1
+            number = normalize_phone(row[column]) if column < len(row) else ""
+            if not number:
+                self.skipped += 1
+                continue
+            if not self._seen.add(number):
+                self.duplicates += 1
+                continue
+            if self.suppression is not None and number in self.suppression:
+                self.suppressed += 1
+                continue
+            self.accepted += 1
+            yield Lead(number, _field(row, timezone_column), _field(row, window_column))
+
+    def stats(self) -> dict:
+        return {
+            "rows": self.rows,
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "suppressed": self.suppressed,
+            "skipped": self.skipped,
+        }
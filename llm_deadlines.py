@@ -0,0 +1,230 @@
+"""Latency budgets for the LLM calls made by the travel planning graph nodes.
+
+A node's budget is how long the caller may be left in silence waiting for
+it: until the response for a single request, or until the first sentence
+and then between sentences for a streamed one. When the budget runs out
+the request is abandoned with DeadlineExceeded and the node answers with
+its deterministic fallback right away.
+
+Before that, a request still unanswered past the node's hedge threshold
+(LLM_HEDGE_PERCENTILE of its recent latencies) gets one duplicate, and
+whichever answers first is used. Slow responses are usually one-off
+stragglers, so the duplicate tends to come back well before the original.
+"""
+
+import asyncio
+import os
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+from latency_metrics import count
+
+# Seconds of silence a node may cause; "node=seconds,..." overrides single nodes,
+# e.g. "summary=3,itinerary_generator=5"
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "5"))
+LLM_DEADLINES = os.getenv("LLM_DEADLINES", "")
+# Hedge once a request is slower than this share of the node's recent requests
+LLM_HEDGING = os.getenv("LLM_HEDGING", "1") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+# Until a node has this many samples it hedges at half its budget
+LLM_HEDGE_MIN_SAMPLES = 20
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The node's latency budget ran out before the LLM answered."""
+
+
+def parse_deadlines(spec: str) -> Dict[str, float]:
+    """"node=seconds,..." as a dict; malformed entries are ignored."""
+    budgets = {}
+    for part in spec.split(","):
+        node, _, seconds = part.partition("=")
+        try:
+            budgets[node.strip()] = float(seconds)
+        except ValueError:
+            continue
+    return budgets
+
+
+class LLMDeadlines:
+    """Per-node budgets, hedge thresholds and the latency samples behind them."""
+
+    def __init__(self, default_seconds: float = LLM_DEADLINE_SECONDS, overrides: str = LLM_DEADLINES,
+                 hedging: bool = LLM_HEDGING, hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+                 max_samples: int = 200):
+        self.default_seconds = default_seconds
+        self.budgets = parse_deadlines(overrides)
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.max_samples = max_samples
+        # Recent time to first answer per node, in seconds
+        self.samples: Dict[str, deque] = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+
+    def budget(self, node: str) -> float:
+        return self.budgets.get(node, self.default_seconds)
+
+    def hedge_after(self, node: str) -> Optional[float]:
+        """Seconds after which a still unanswered request is duplicated; None for never."""
+        if not self.hedging:
+            return None
+        budget = self.budget(node)
+        samples = self.samples.get(node)
+        if not samples or len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return budget / 2
+        ordered = sorted(samples)
+        threshold = ordered[min(len(ordered) - 1, int(self.hedge_percentile * len(ordered)))]
+        # A duplicate that can't answer within the budget only adds load
+        return threshold if threshold < budget else None
+
+    def _record(self, node: str, seconds: float):
+        samples = self.samples.get(node)
+        if samples is None:
+            samples = self.samples[node] = deque(maxlen=self.max_samples)
+        samples.append(seconds)
+
+    def record_fallback(self, node: str):
+        """Counts a node answering with its fallback (after a timeout or an error)."""
+        self.fallbacks += 1
+        count("llm_fallbacks", node=node)
+
+    def _timeout(self, node: str) -> DeadlineExceeded:
+        self.timeouts += 1
+        count("llm_timeouts", node=node)
+        return DeadlineExceeded(f"{node} LLM call exceeded its {self.budget(node):g}s budget")
+
+    async def _first(self, node: str, start: Callable[[], Awaitable[T]], tasks: Dict[asyncio.Future, int],
+                     waited: float) -> tuple:
+        """Waits for the first successful attempt, hedging once; returns (result, attempt)."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.budget(node) - waited
+        if deadline <= started:
+            raise self._timeout(node)
+        hedge_at = self.hedge_after(node)
+        tasks[asyncio.ensure_future(start())] = 0
+        error: Optional[BaseException] = None
+        while tasks:
+            now = loop.time()
+            wait_until = deadline
+            if hedge_at is not None and len(tasks) == 1 and error is None:
+                wait_until = min(deadline, started + hedge_at)
+            done, _ = await asyncio.wait(set(tasks), timeout=max(0.0, wait_until - now),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if loop.time() >= deadline:
+                    raise self._timeout(node)
+                # Past the hedge threshold: one duplicate races the original
+                self.hedges += 1
+                count("llm_hedges", node=node)
+                tasks[asyncio.ensure_future(start())] = 1
+                hedge_at = None
+                hedge_started = loop.time()
+                continue
+            for task in done:
+                attempt = tasks.pop(task)
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                if attempt:
+                    self.hedge_wins += 1
+                    count("llm_hedge_wins", node=node)
+                    self._record(node, loop.time() - hedge_started)
+                else:
+                    self._record(node, loop.time() - started)
+                return task.result(), attempt
+        # Every attempt failed
+        raise error
+
+    async def call(self, node: str, request: Callable[[], Awaitable[T]], waited: float = 0.0) -> T:
+        """Awaits `request()` within the node's budget, hedging once if it is slow.
+
+        `waited` is silence the caller already sat through for this node
+        (e.g. waiting on another generation) and is taken off the budget.
+        """
+        tasks: Dict[asyncio.Future, int] = {}
+        try:
+            result, _ = await self._first(node, request, tasks, waited)
+            return result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream(self, node: str, open_stream: Callable[[], AsyncIterator[T]],
+                     waited: float = 0.0) -> AsyncIterator[T]:
+        """Items of `open_stream()`, with the budget applied to the first item and each gap after.
+
+        `waited` is taken off the budget for the first item, as in call().
+
+        Only the first item is hedged: a duplicate stream is opened if the
+        first is slow to start, and the one that starts first is followed.
+        """
+        streams = []
+
+        async def first_item():
+            stream = open_stream().__aiter__()
+            streams.append(stream)
+            return stream, await stream.__anext__()
+
+        tasks: Dict[asyncio.Future, int] = {}
+        winner = None
+        try:
+            try:
+                (winner, item), _ = await self._first(node, first_item, tasks, waited)
+            except StopAsyncIteration:
+                return
+            finally:
+                await _discard(tasks)
+                for stream in streams:
+                    if stream is not winner:
+                        await _close(stream)
+            yield item
+            budget = self.budget(node)
+            while True:
+                try:
+                    item = await asyncio.wait_for(winner.__anext__(), budget)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    raise self._timeout(node) from None
+                yield item
+        finally:
+            if winner is not None:
+                await _close(winner)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "fallbacks": self.fallbacks,
+        }
+
+
+async def _discard(tasks: Dict[asyncio.Future, int]):
+    """Cancels attempts that lost the race and waits for them to unwind."""
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        try:
+            await task
+        except BaseException:
+            pass
+    tasks.clear()
+
+
+async def _close(stream):
+    try:
+        await stream.aclose()
+    except (AttributeError, RuntimeError):
+        # Not a generator, or already finished by its cancelled attempt
+        pass
+
+
+# Shared by every session in the worker process, so hedge thresholds learn from all calls
+llm_deadlines = LLMDeadlines()
@@ -0,0 +1,230 @@
+"""Cache for generated itineraries and summaries.
+
+Plans only depend on budget, activities and preference, so thousands of
+leads end up asking for the same few plans. Entries are keyed on a
+normalized form of those inputs (bucketed budget, sorted activity set,
+preference, plus any prices quoted in the text, which bucketing would
+otherwise mix up between callers) and kept in a bounded in-memory LRU with a TTL. An optional
+SQLite file (PLAN_CACHE_DB) acts as a second level shared by every worker
+process on the host; it is read and written from a thread, so another
+process holding the file locked never stalls the event loop.
+
+Concurrent requests for the same plan share one generation: the second
+caller waits for the first instead of making its own LLM call, which is how
+speculative plans are handed over to the conversation that needs them.
+"""
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "1024"))
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "86400"))
+PLAN_CACHE_BUDGET_BUCKET = int(os.getenv("PLAN_CACHE_BUDGET_BUCKET", "500"))
+PLAN_CACHE_DB = os.getenv("PLAN_CACHE_DB")
+PLAN_CACHE_DB_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_DB_MAX_ENTRIES", "100000"))
+
+
+def plan_key(budget: int, activities: Iterable[str], preference: Optional[str],
+             bucket: int = PLAN_CACHE_BUDGET_BUCKET, prices: Iterable[int] = ()) -> str:
+    """Normalizes plan inputs so near-identical requests share an entry.
+
+    `prices` are exact amounts the generated text repeats (e.g. the flight
+    and hotel in a summary); only the budget is rewritten on a hit.
+    """
+    bucket = max(1, bucket)
+    bucketed = max(bucket, int(round(budget / bucket)) * bucket)
+    activity_set = sorted({a.strip().lower() for a in activities if a and a.strip()})
+    key = f"{bucketed}|{','.join(activity_set)}|{preference or ''}"
+    prices = list(prices)
+    return f"{key}|{','.join(str(price) for price in prices)}" if prices else key
+
+
+def _rebase_budget(text: str, generated_for: int, budget: int) -> str:
+    """Rewrites the dollar amount a cached plan was generated for to the caller's budget."""
+    if generated_for == budget:
+        return text
+    amount = re.escape(f"{generated_for:,}").replace(",", ",?")
+    return re.sub(rf"\$\s?{amount}(?![\d,])", f"${budget:,}", text)
+
+
+class PlanCache:
+    """Two-level LRU/TTL cache: in-process memory, optionally backed by SQLite."""
+
+    def __init__(self, max_entries: int = PLAN_CACHE_SIZE, ttl: float = PLAN_CACHE_TTL,
+                 db_path: Optional[str] = PLAN_CACHE_DB,
+                 db_max_entries: int = PLAN_CACHE_DB_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.db_max_entries = db_max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, int, float]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        # The connection is used from asyncio.to_thread() workers
+        self._db_lock = threading.Lock()
+        # Generations in progress; resolve to (text, budget) or None if they failed
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._puts = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.joins = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or bool(self.db_path)
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            # A plan is waiting on every lookup; if another process holds the file, generating beats waiting
+            self._db = sqlite3.connect(self.db_path, timeout=0.5, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS plan_cache ("
+                " kind TEXT NOT NULL, key TEXT NOT NULL, text TEXT NOT NULL,"
+                " budget INTEGER NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL,"
+                " PRIMARY KEY (kind, key))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS plan_cache_used ON plan_cache (used_at)")
+        return self._db
+
+    def _remember(self, kind: str, key: str, text: str, budget: int, expires_at: float):
+        if self.max_entries <= 0:
+            return
+        self._entries[(kind, key)] = (text, budget, expires_at)
+        self._entries.move_to_end((kind, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, kind: str, key: str, now: float) -> Optional[Tuple[str, int, float]]:
+        """(text, budget, expires_at) of the unexpired SQLite entry, if any."""
+        with self._db_lock:
+            db = self._conn()
+            row = db.execute(
+                "SELECT text, budget, expires_at FROM plan_cache WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] <= now:
+                db.execute("DELETE FROM plan_cache WHERE kind = ? AND key = ?", (kind, key))
+                self.expirations += 1
+                return None
+            db.execute("UPDATE plan_cache SET used_at = ? WHERE kind = ? AND key = ?", (now, kind, key))
+            return row
+
+    def _store(self, kind: str, key: str, text: str, budget: int, expires_at: float, now: float):
+        with self._db_lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO plan_cache (kind, key, text, budget, expires_at, used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, text, budget, expires_at, now),
+            )
+            self._puts += 1
+            # Trim expired and least recently used rows every so often
+            if self._puts % 100 == 0:
+                db.execute("DELETE FROM plan_cache WHERE expires_at <= ?", (now,))
+                db.execute(
+                    "DELETE FROM plan_cache WHERE rowid IN ("
+                    " SELECT rowid FROM plan_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.db_max_entries,),
+                )
+
+    async def get(self, kind: str, key: str, budget: int) -> Optional[str]:
+        """Returns the cached text for kind ("itinerary"/"summary") and key, adjusted to budget."""
+        now = time.time()
+        entry = self._entries.get((kind, key))
+        if entry is not None:
+            text, generated_for, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end((kind, key))
+                self.hits += 1
+                return _rebase_budget(text, generated_for, budget)
+            del self._entries[(kind, key)]
+            self.expirations += 1
+
+        if self.db_path:
+            try:
+                row = await asyncio.to_thread(self._load, kind, key, now)
+            except sqlite3.Error:
+                # Locked by another process or unavailable; a miss
+                row = None
+            if row is not None:
+                self._remember(kind, key, *row)
+                self.hits += 1
+                self.disk_hits += 1
+                return _rebase_budget(row[0], row[1], budget)
+
+        self.misses += 1
+        return None
+
+    async def put(self, kind: str, key: str, text: str, budget: int):
+        now = time.time()
+        expires_at = now + self.ttl
+        self._remember(kind, key, text, budget, expires_at)
+        if not self.db_path:
+            return
+        try:
+            await asyncio.to_thread(self._store, kind, key, text, budget, expires_at, now)
+        except sqlite3.Error:
+            pass
+
+    async def get_or_generate(self, kind: str, key: str, budget: int,
+                              generate: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        """Returns the cached text, or joins/starts the one generation for this entry.
+
+        `generate` is only called when nothing is cached and no other caller
+        is already generating the same entry. Its result is cached unless empty.
+        """
+        cached = await self.get(kind, key, budget)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get((kind, key))
+        if pending is not None:
+            # Shielded so a cancelled waiter doesn't cancel the shared generation
+            result = await asyncio.shield(pending)
+            if result is not None:
+                self.joins += 1
+                text, generated_for = result
+                return _rebase_budget(text, generated_for, budget)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[(kind, key)] = future
+        text = None
+        try:
+            text = await generate()
+        finally:
+            if self._inflight.get((kind, key)) is future:
+                del self._inflight[(kind, key)]
+            future.set_result((text, budget) if text else None)
+        if text:
+            await self.put(kind, key, text, budget)
+        return text
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "joins": self.joins,
+            "size": len(self._entries),
+            "budget_bucket": PLAN_CACHE_BUDGET_BUCKET,
+        }
+
+
+# Shared by every session in this process
+plan_cache = PlanCache()
@@ -0,0 +1,246 @@
+"""Deterministic fast-path extraction of travel slots from caller utterances.
+
+Each extractor returns a value together with a confidence in [0, 1]. The
+agent only falls back to an LLM round trip when the confidence is below
+FAST_PATH_MIN_CONFIDENCE.
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.8"))
+
+# Process-wide counters: how often the fast path answered vs. the LLM was needed
+fast_path_stats = {"hits": 0, "misses": 0}
+
+
+def record_fast_path(hit: bool):
+    fast_path_stats["hits" if hit else "misses"] += 1
+
+
+def fast_path_hit_rate() -> float:
+    total = fast_path_stats["hits"] + fast_path_stats["misses"]
+    return fast_path_stats["hits"] / total if total else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Budget
+# ---------------------------------------------------------------------------
+
+_UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16,
+    "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+_TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60,
+    "seventy": 70, "eighty": 80, "ninety": 90,
+}
+_SCALES = {"hundred": 100, "thousand": 1000, "grand": 1000, "k": 1000, "million": 1000000}
+
+_CURRENCY_WORDS = {"dollar", "dollars", "usd", "bucks", "budget", "spend", "spending", "$"}
+# Numbers followed by one of these are not money ("3 days", "two people")
+_NON_MONEY_UNITS = {
+    "day", "days", "night", "nights", "week", "weeks", "people", "person",
+    "persons", "adults", "kids", "children", "hours", "stars", "star",
+}
+
+_NUMERIC_AMOUNT = re.compile(r"(\$)?\s*(\d+(?:\.\d+)?)\s*(k|grand|thousand|million)?\b")
+_TOKEN = re.compile(r"\$|[a-z]+|\d+(?:\.\d+)?")
+
+
+def _words_to_number(words: List[str]) -> Optional[int]:
+    total, current, seen = 0, 0, False
+    for word in words:
+        if word in _UNITS:
+            current += _UNITS[word]
+        elif word in _TENS:
+            current += _TENS[word]
+        elif word == "hundred":
+            current = (current or 1) * 100
+        elif word in _SCALES:
+            total += (current or 1) * _SCALES[word]
+            current = 0
+        elif word in ("a", "and"):
+            continue
+        else:
+            return None
+        seen = True
+    return total + current if seen else None
+
+
+def _spoken_amounts(tokens: List[str]) -> List[Tuple[int, int]]:
+    """Finds runs of number words, returning (value, index after the run)."""
+    amounts = []
+    number_words = set(_UNITS) | set(_TENS) | set(_SCALES)
+    i = 0
+    while i < len(tokens):
+        # Scale words right after digits ("3 grand") are handled by the numeric pattern
+        after_digits = i > 0 and tokens[i - 1][0].isdigit()
+        if tokens[i] in number_words and tokens[i] != "k" and not after_digits:
+            j = i
+            while j < len(tokens) and (tokens[j] in number_words or (tokens[j] in ("a", "and") and j > i)):
+                j += 1
+            # Don't let a trailing "and" swallow the next phrase
+            while j > i and tokens[j - 1] in ("a", "and"):
+                j -= 1
+            value = _words_to_number(tokens[i:j])
+            if value is not None:
+                amounts.append((value, j))
+            i = j
+        else:
+            i += 1
+    return amounts
+
+
+def extract_budget(text: str) -> Tuple[Optional[int], float]:
+    """Parses a budget like "$2,000", "about 3k" or "two thousand dollars"."""
+    normalized = (text or "").lower()
+    # "2,500" -> "2500"
+    normalized = re.sub(r"(?<=\d),(?=\d{3}\b)", "", normalized)
+    tokens = _TOKEN.findall(normalized)
+    has_currency = any(token in _CURRENCY_WORDS for token in tokens) or "$" in normalized
+
+    amounts: List[Tuple[int, bool]] = []
+    for match in _NUMERIC_AMOUNT.finditer(normalized):
+        value = float(match.group(2))
+        scale = match.group(3)
+        if scale:
+            value *= _SCALES[scale]
+        following = normalized[match.end():].split()
+        if not scale and following and following[0].strip(".,!?") in _NON_MONEY_UNITS:
+            continue
+        amounts.append((int(value), bool(match.group(1) or scale)))
+
+    for value, end in _spoken_amounts(tokens):
+        if end < len(tokens) and tokens[end] in _NON_MONEY_UNITS:
+            continue
+        amounts.append((value, True))
+
+    distinct = {value for value, _ in amounts}
+    if len(distinct) != 1:
+        # Nothing found, or a range/comparison the LLM should interpret
+        return (max(distinct) if distinct else None), 0.0
+
+    value = distinct.pop()
+    if value < 50:
+        # Too small to be a trip budget; probably a count of something else
+        return value, 0.2
+    if has_currency or any(explicit for _, explicit in amounts):
+        return value, 0.95
+    # A bare number in answer to the budget question
+    return value, 0.85 if len(tokens) <= 4 else 0.6
+
+
+# ---------------------------------------------------------------------------
+# Activities
+# ---------------------------------------------------------------------------
+
+ACTIVITY_KEYWORDS: Dict[str, List[str]] = {
+    "museums": ["museum", "museums", "gallery", "galleries", "art"],
+    "hiking": ["hike", "hikes", "hiking", "trek", "trekking", "trail", "trails", "mountain", "mountains"],
+    "beaches": ["beach", "beaches", "ocean", "sea", "swimming", "snorkeling", "snorkelling", "surfing"],
+    "food tours": ["food", "foodie", "cuisine", "restaurant", "restaurants", "eating", "culinary", "street food"],
+    "nightlife": ["nightlife", "bar", "bars", "club", "clubs", "clubbing", "party", "partying", "pubs"],
+    "shopping": ["shopping", "shop", "shops", "market", "markets", "boutiques"],
+    "sightseeing": ["sightseeing", "sights", "landmarks", "monuments", "city tour", "city tours"],
+    "cultural experiences": ["culture", "cultural", "history", "historical", "temples", "architecture"],
+    "adventure sports": ["adventure", "rafting", "skydiving", "diving", "scuba", "climbing", "kayaking", "ziplining"],
+    "relaxation": ["relax", "relaxing", "relaxation", "spa", "spas", "wellness"],
+    "skiing": ["ski", "skiing", "snowboarding"],
+    "wildlife": ["safari", "wildlife", "nature"],
+    "wine tasting": ["wine", "wineries", "vineyard", "vineyards"],
+}
+
+_NEGATION = re.compile(r"\b(not|no|don't|dont|never|hate|without|except)\b")
+_UNSURE = re.compile(r"\b(not sure|no idea|don't know|dont know|anything|whatever|suggest)\b")
+
+
+def extract_activities(text: str) -> Tuple[List[str], float]:
+    """Matches an utterance against the activity vocabulary."""
+    normalized = " " + re.sub(r"[^a-z' ]+", " ", (text or "").lower()) + " "
+    found: List[str] = []
+    for activity, keywords in ACTIVITY_KEYWORDS.items():
+        if any(f" {keyword} " in normalized for keyword in keywords):
+            found.append(activity)
+
+    if not found or _UNSURE.search(normalized):
+        return found, 0.0
+    if _NEGATION.search(normalized):
+        # "anything but hiking" needs real understanding
+        return found, 0.3
+    return found, 0.9
+
+
+# ---------------------------------------------------------------------------
+# Travel style preference
+# ---------------------------------------------------------------------------
+
+_LUXURY = re.compile(
+    r"\b(luxury|luxurious|premium|high[- ]end|five[- ]star|5[- ]star|upscale|fancy|splurge|"
+    r"deluxe|first[- ]class|lavish|treat (?:myself|ourselves))\b"
+)
+_ECONOMY = re.compile(
+    r"\b(budget|cheap|cheaper|economy|economical|affordable|value|save|saving|backpack|backpacking|"
+    r"inexpensive|low[- ]cost|frugal|modest|simple)\b"
+)
+# Only these count when the caller is answering another question: in "my
+# budget is 2000", "budget" says nothing about travel style
+_EXPLICIT_LUXURY = re.compile(
+    r"\b(luxury|luxurious|premium|high[- ]end|five[- ]star|5[- ]star|upscale|deluxe|first[- ]class)\b"
+)
+_EXPLICIT_ECONOMY = re.compile(
+    r"\b(cheap|cheaper|cheapest|economy|economical|inexpensive|low[- ]cost|frugal|backpacking)\b"
+)
+_NEGATED_LUXURY = re.compile(
+    r"\b(nothing|not|no|don't need|dont need|without)\s+(?:too\s+|very\s+|that\s+|anything\s+)?"
+    r"(fancy|luxury|luxurious|expensive|high[- ]end|premium|upscale)\b"
+)
+
+
+def extract_preference(text: str, explicit_only: bool = False) -> Tuple[Optional[str], float]:
+    """Classifies a travel-style answer as "luxury" or "economy".
+
+    With `explicit_only`, looser words like "budget", "value" or "simple"
+    are ignored; used when the preference question wasn't the one asked.
+    """
+    normalized = (text or "").lower()
+    if _NEGATED_LUXURY.search(normalized):
+        return "economy", 0.9
+
+    luxury = len((_EXPLICIT_LUXURY if explicit_only else _LUXURY).findall(normalized))
+    economy = len((_EXPLICIT_ECONOMY if explicit_only else _ECONOMY).findall(normalized))
+    if luxury and not economy:
+        return "luxury", 0.9
+    if economy and not luxury:
+        return "economy", 0.9
+    if luxury or economy:
+        # Mixed signals ("luxury but on a budget")
+        return ("luxury" if luxury > economy else "economy"), 0.4
+    return None, 0.0
+
+
+_EXTRACTORS = {
+    "budget": extract_budget,
+    "activities": extract_activities,
+    "preference": extract_preference,
+}
+
+
+def extract_slots(text: str, slots: List[str], asked: Optional[str] = None) -> Dict:
+    """Runs the extractors for the given slots, keeping only confident values.
+
+    `asked` is the slot the caller was just asked about; the preference is
+    only taken from an answer to another question when it is explicit.
+    """
+    found = {}
+    for slot in slots:
+        if slot == "preference" and asked not in (None, "preference"):
+            value, confidence = extract_preference(text, explicit_only=True)
+        else:
+            value, confidence = _EXTRACTORS[slot](text)
+        if value and confidence >= FAST_PATH_MIN_CONFIDENCE:
+            found[slot] = value
+    return found
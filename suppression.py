@@ -0,0 +1,282 @@
+"""Suppression (do-not-call) list shared by every campaign.
+
+Numbers live in a SQLite table (SUPPRESSION_DB) that can hold millions of
+entries. Uploads are checked number by number, so a Bloom filter of the
+whole list is kept in memory in front of it: almost every number that
+isn't suppressed is ruled out without touching the database, and only the
+rare filter hits are confirmed with an indexed lookup.
+
+The filter is saved with the list and only topped up with rows added since,
+so startup doesn't rescan millions of numbers. Rows are never deleted, so
+rowids only grow and "added since" is a rowid range; other processes (e.g.
+dialer workers) may add numbers too, and refresh() picks them up.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import AsyncIterable, Iterator, List, Optional, Tuple
+
+SUPPRESSION_DB = os.getenv("SUPPRESSION_DB", "suppression.sqlite")
+# Numbers the filter is sized for before it is rebuilt larger, and its false positive rate
+SUPPRESSION_CAPACITY = int(os.getenv("SUPPRESSION_CAPACITY", "10000000"))
+SUPPRESSION_FP_RATE = float(os.getenv("SUPPRESSION_FP_RATE", "0.01"))
+# Add numbers to the list once a campaign has reached them, so no lead is called twice
+SUPPRESS_CALLED = os.getenv("SUPPRESS_CALLED", "1") == "1"
+
+IMPORT_BATCH_SIZE = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suppressed (
+    phone TEXT NOT NULL UNIQUE,
+    reason TEXT,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS suppression_filter (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    capacity INTEGER NOT NULL,
+    fp_rate REAL NOT NULL,
+    count INTEGER NOT NULL,
+    last_rowid INTEGER NOT NULL,
+    bits BLOB NOT NULL
+);
+"""
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN64 = 0x9E3779B97F4A7C15
+
+
+def _hash(number: str) -> int:
+    """64-bit hash of a normalized number.
+
+    Digits-only numbers are parsed as ints and mixed with one multiply
+    (Fibonacci hashing), which keeps the check cheap enough to run on every
+    uploaded number; anything else goes through blake2b.
+    """
+    try:
+        x = int(number[1:])
+    except ValueError:
+        return int.from_bytes(hashlib.blake2b(number.encode(), digest_size=8).digest(), "little")
+    x = (x * _GOLDEN64) & _MASK64
+    return x ^ (x >> 29)
+
+
+class BloomFilter:
+    """Bit array with k probes per number (double hashing); no false negatives.
+
+    Numbers are hashed from their digits (a leading zero isn't significant
+    to the filter); exact matches are always confirmed by the caller.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float, bits: Optional[bytes] = None):
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self.size = max(64, math.ceil(-self.capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, number: str):
+        h = _hash(number)
+        h1, h2, size, bits = h & 0xFFFFFFFF, (h >> 32) | 1, self.size, self.bits
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % size
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, number: str) -> bool:
+        h = _hash(number)
+        h1, h2, size, bits = h & 0xFFFFFFFF, (h >> 32) | 1, self.size, self.bits
+        # Most numbers not in the filter are ruled out by the first probe
+        pos = h1 % size
+        if not bits[pos >> 3] & (1 << (pos & 7)):
+            return False
+        for i in range(1, self.hashes):
+            pos = (h1 + i * h2) % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class SuppressionList:
+    """Persistent set of numbers that must not be called."""
+
+    def __init__(self, path: str = SUPPRESSION_DB, capacity: int = SUPPRESSION_CAPACITY,
+                 fp_rate: float = SUPPRESSION_FP_RATE):
+        self.path = path
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.filter: Optional[BloomFilter] = None
+        self.last_rowid = 0
+        self.checks = 0
+        self.filter_hits = 0
+        self.false_positives = 0
+        self._db: Optional[sqlite3.Connection] = None
+        # Connected calls are suppressed from a worker thread (add_called()),
+        # while uploads check and import numbers on the event loop
+        self._lock = threading.RLock()
+
+    def open(self):
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def load(self):
+        """Loads the saved filter (or builds one) so membership can be checked.
+
+        Processes that only add numbers don't need it.
+        """
+        row = self._db.execute(
+            "SELECT capacity, fp_rate, count, last_rowid, bits FROM suppression_filter WHERE id = 1"
+        ).fetchone()
+        if row is not None and row[0] >= self.capacity and row[1] == self.fp_rate:
+            capacity, fp_rate, count, self.last_rowid, bits = row
+            self.filter = BloomFilter(capacity, fp_rate, bits)
+            self.filter.count = count
+            self.refresh()
+        else:
+            self._rebuild(max(self.capacity, self.count()))
+
+    def close(self):
+        if self._db is None:
+            return
+        if self.filter is not None:
+            self.save_filter()
+        self._db.close()
+        self._db = None
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM suppressed").fetchone()[0]
+
+    def _fill(self, bloom: BloomFilter, after: int) -> int:
+        """Adds every number past rowid `after` to `bloom`; returns the last rowid added."""
+        while True:
+            rows = self._db.execute(
+                "SELECT rowid, phone FROM suppressed WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (after, IMPORT_BATCH_SIZE),
+            ).fetchall()
+            if not rows:
+                return after
+            for _, phone in rows:
+                bloom.add(phone)
+            after = rows[-1][0]
+
+    def _rebuild(self, capacity: int):
+        bloom = BloomFilter(capacity, self.fp_rate)
+        last_rowid = self._fill(bloom, 0)
+        # Swapped in only once complete: lookups on the event loop don't take
+        # the lock, and a half-filled filter would let suppressed numbers through
+        self.filter, self.last_rowid = bloom, last_rowid
+        self.save_filter()
+
+    def refresh(self):
+        """Adds numbers suppressed since the filter was last brought up to date."""
+        if self.filter is None:
+            return
+        with self._lock:
+            self.last_rowid = self._fill(self.filter, self.last_rowid)
+            if self.filter.count > self.filter.capacity:
+                # Past capacity the false positive rate climbs; start over twice as large
+                self._rebuild(self.filter.count * 2)
+
+    def save_filter(self):
+        f = self.filter
+        self._db.execute(
+            "INSERT OR REPLACE INTO suppression_filter (id, capacity, fp_rate, count, last_rowid, bits)"
+            " VALUES (1, ?, ?, ?, ?, ?)",
+            (f.capacity, f.fp_rate, f.count, self.last_rowid, bytes(f.bits)),
+        )
+
+    def __contains__(self, number: str) -> bool:
+        self.checks += 1
+        bloom = self.filter
+        if not bloom.count or number not in bloom:
+            return False
+        self.filter_hits += 1
+        with self._lock:
+            found = self._db.execute("SELECT 1 FROM suppressed WHERE phone = ?", (number,)).fetchone() is not None
+        if not found:
+            self.false_positives += 1
+        return found
+
+    def add(self, number: str, reason: str):
+        self.add_many([number], reason)
+
+    async def add_called(self, number: str, reason: str) -> bool:
+        """Suppresses a number a campaign just reached, off the event loop.
+
+        The call has already happened, so a locked or unavailable database
+        is reported instead of raised; returns whether the number was saved.
+        """
+        try:
+            await asyncio.to_thread(self.add, number, reason)
+            return True
+        except Exception as e:
+            print(f"⚠️  Could not add {number} to the suppression list: {e}")
+            return False
+
+    def add_many(self, numbers: List[str], reason: str) -> int:
+        """Suppresses normalized numbers; returns how many weren't already."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                added = self._db.executemany(
+                    "INSERT OR IGNORE INTO suppressed (phone, reason, added_at) VALUES (?, ?, ?)",
+                    [(number, reason, now) for number in numbers],
+                ).rowcount
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self.refresh()
+        return added
+
+    async def import_numbers(self, numbers: AsyncIterable[str], reason: str) -> Tuple[int, int]:
+        """Suppresses a stream of numbers in batches; returns (added, already suppressed)."""
+        added = total = 0
+        batch: List[str] = []
+        async for number in numbers:
+            batch.append(number)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                total += len(batch)
+                added += self.add_many(batch, reason)
+                batch = []
+                await asyncio.sleep(0)
+        if batch:
+            total += len(batch)
+            added += self.add_many(batch, reason)
+        if self.filter is not None:
+            self.save_filter()
+        return added, total - added
+
+    def export_rows(self) -> Iterator[Tuple[str, Optional[str], float]]:
+        """(phone, reason, added_at) for every suppressed number, oldest first."""
+        after = 0
+        while True:
+            rows = self._db.execute(
+                "SELECT rowid, phone, reason, added_at FROM suppressed WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (after, IMPORT_BATCH_SIZE),
+            ).fetchall()
+            if not rows:
+                return
+            for _, phone, reason, added_at in rows:
+                yield phone, reason, added_at
+            after = rows[-1][0]
+
+    def stats(self) -> dict:
+        f = self.filter
+        return {
+            "numbers": self.count(),
+            "filter_capacity": f.capacity if f else None,
+            "filter_bytes": len(f.bits) if f else None,
+            "filter_hashes": f.hashes if f else None,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+        }
@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from call_scheduling import CallingWindow, RetryPolicy, RetryScheduler, parse_window
+from langgraph_make_call import CallResult
+
+NO_ANSWER = CallResult("no_answer", retryable=True)
+
+
+def utc(hour: int, minute: int = 0) -> float:
+    return datetime(2026, 3, 10, hour, minute, tzinfo=timezone.utc).timestamp()
+
+
+def test_retry_delay_doubles_up_to_the_maximum():
+    policy = RetryPolicy(max_attempts=10, base_seconds=60, max_seconds=300, jitter=0)
+    assert [policy.next_attempt(n, NO_ANSWER, 1000) - 1000 for n in range(1, 6)] == [60, 120, 240, 300, 300]
+
+
+def test_retry_delay_jitter_stays_in_range():
+    policy = RetryPolicy(max_attempts=10, base_seconds=100, max_seconds=1000, jitter=0.2)
+    delays = [policy.next_attempt(1, NO_ANSWER, 0) for _ in range(200)]
+    assert all(80 <= delay <= 120 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_no_retry_after_the_last_attempt_or_a_final_outcome():
+    policy = RetryPolicy(max_attempts=3, base_seconds=60, max_seconds=300, jitter=0)
+    assert policy.next_attempt(3, NO_ANSWER, 0) is None
+    assert policy.next_attempt(1, CallResult("connected"), 0) is None
+
+
+@pytest.mark.parametrize("spec, window", [
+    ("", None),
+    ("nonsense", None),
+    ("09:00-09:00", None),
+    ("09:00-17:30", ((9, 0), (17, 30))),
+])
+def test_parse_window(spec, window):
+    parsed = parse_window(spec)
+    assert (None if parsed is None else tuple((t.hour, t.minute) for t in parsed)) == window
+
+
+def test_daytime_window():
+    window = CallingWindow("09:00-17:00")
+    assert window.next_open(utc(12), "UTC") == utc(12)
+    assert window.next_open(utc(7), "UTC") == utc(9)
+    assert window.next_open(utc(18), "UTC") == utc(9) + 86400
+
+
+@pytest.mark.parametrize("hour, opens", [
+    (20, utc(20)),
+    (1, utc(1)),
+    (2, utc(18)),
+    (12, utc(18)),
+])
+def test_overnight_window(hour, opens):
+    assert CallingWindow("18:00-02:00").next_open(utc(hour), "UTC") == opens
+
+
+def test_window_is_in_the_numbers_timezone():
+    # 12:00 UTC is 08:00 in New York (EDT), before the window opens at 09:00 local
+    assert CallingWindow("09:00-17:00").next_open(utc(12), "America/New_York") == utc(13)
+
+
+def test_per_number_window_overrides_the_default():
+    assert CallingWindow("09:00-17:00").next_open(utc(20), "UTC", spec="18:00-22:00") == utc(20)
+
+
+def test_retry_scheduler_pops_in_due_order():
+    scheduler = RetryScheduler()
+    scheduler.push(30, "+15550000003")
+    scheduler.push(10, "+15550000001")
+    scheduler.push(10, "+15550000002")
+    assert scheduler.next_due() == 10
+    assert scheduler.pop_due(5) is None
+    assert [scheduler.pop_due(30) for _ in range(3)] == [
+        (10, "+15550000001"), (10, "+15550000002"), (30, "+15550000003"),
+    ]
+    assert len(scheduler) == 0
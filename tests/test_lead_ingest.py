@@ -0,0 +1,70 @@
+import asyncio
+import gzip
+import io
+
+from lead_ingest import Lead, LeadReader, normalize_phone
+
+
+class Upload:
+    """Stands in for an UploadFile: async read() over bytes."""
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._data.read(size)
+
+
+def read_leads(data: bytes, chunk_size: int = 7, suppression=None):
+    reader = LeadReader(Upload(data), chunk_size=chunk_size, suppression=suppression)
+
+    async def collect():
+        return [lead async for lead in reader]
+
+    return asyncio.run(collect()), reader.stats()
+
+
+def test_normalize_phone():
+    assert normalize_phone(" (555) 010-2030 ") == "+5550102030"
+    assert normalize_phone("+44 20 7946 0000") == "+442079460000"
+    assert normalize_phone("   ") == ""
+
+
+def test_headerless_list_is_deduplicated():
+    leads, stats = read_leads(b"15550000001\n1 555 000 0002\n+15550000001\n\n")
+    assert [lead.phone for lead in leads] == ["+15550000001", "+15550000002"]
+    assert stats == {"rows": 3, "accepted": 2, "duplicates": 1, "suppressed": 0, "skipped": 0}
+
+
+def test_gzip_upload_is_decompressed():
+    rows = "".join(f"name{i},+1555{i:07d}\n" for i in range(500))
+    data = gzip.compress(("name,phone\n" + rows).encode())
+    leads, stats = read_leads(data, chunk_size=64)
+    assert len(leads) == 500
+    assert leads[0].phone == "+15550000000"
+    assert leads[-1].phone == "+15550000499"
+
+
+def test_quoted_newline_across_chunks():
+    data = (
+        b'name,notes,phone,timezone,call_window\r\n'
+        b'Ann,"call after lunch,\nnot before",+15550000001,America/New_York,09:00-17:00\r\n'
+        b'"Bob ""B""","line one\nline two\nline three",15550000002,,\r\n'
+    )
+    leads, stats = read_leads(data, chunk_size=5)
+    assert leads == [
+        Lead("+15550000001", "America/New_York", "09:00-17:00"),
+        Lead("+15550000002", None, None),
+    ]
+    assert stats["rows"] == 2
+
+
+def test_utf8_bom_header_is_recognized():
+    leads, _ = read_leads("﻿Phone Number,name\n+15550000001,Ann\n".encode())
+    assert leads == [Lead("+15550000001")]
+
+
+def test_suppressed_numbers_are_left_out():
+    leads, stats = read_leads(b"+15550000001\n+15550000002\n", suppression={"+15550000002"})
+    assert [lead.phone for lead in leads] == ["+15550000001"]
+    assert stats["suppressed"] == 1
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from llm_deadlines import DeadlineExceeded, LLMDeadlines, parse_deadlines
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_parse_deadlines_ignores_malformed_entries():
+    assert parse_deadlines("summary=3, itinerary_generator=5,bad,x=y") == {"summary": 3.0, "itinerary_generator": 5.0}
+
+
+def test_slow_request_is_hedged_and_the_duplicate_wins():
+    deadlines = LLMDeadlines(default_seconds=1.0, hedging=True)
+    attempts = []
+
+    async def request():
+        attempts.append(len(attempts))
+        # The first attempt is a straggler; the duplicate answers right away
+        await asyncio.sleep(5 if len(attempts) == 1 else 0)
+        return f"answer {len(attempts)}"
+
+    assert run(deadlines.call("summary", request)) == "answer 2"
+    assert len(attempts) == 2
+    assert (deadlines.hedges, deadlines.hedge_wins, deadlines.timeouts) == (1, 1, 0)
+
+
+def test_hedge_threshold_follows_recent_latencies():
+    deadlines = LLMDeadlines(default_seconds=4.0, hedging=True, hedge_percentile=0.5)
+    assert deadlines.hedge_after("summary") == 2.0
+    for seconds in range(1, 21):
+        deadlines._record("summary", seconds / 10)
+    assert deadlines.hedge_after("summary") == 1.1
+    assert LLMDeadlines(hedging=False).hedge_after("summary") is None
+
+
+def test_request_past_its_budget_raises_deadline_exceeded():
+    deadlines = LLMDeadlines(default_seconds=0.05, hedging=False)
+
+    async def request():
+        await asyncio.sleep(5)
+
+    with pytest.raises(DeadlineExceeded):
+        run(deadlines.call("summary", request))
+    assert deadlines.timeouts == 1
+
+
+def test_time_already_waited_comes_off_the_budget():
+    deadlines = LLMDeadlines(default_seconds=1.0, hedging=False)
+
+    async def request():
+        return "too late"
+
+    with pytest.raises(DeadlineExceeded):
+        run(deadlines.call("summary", request, waited=1.0))
+
+
+def test_stream_applies_the_budget_between_items():
+    deadlines = LLMDeadlines(default_seconds=0.05, hedging=False)
+    received = []
+
+    async def sentences():
+        yield "First."
+        await asyncio.sleep(5)
+        yield "Second."
+
+    async def consume():
+        async for sentence in deadlines.stream("itinerary_generator", sentences):
+            received.append(sentence)
+
+    with pytest.raises(DeadlineExceeded):
+        run(consume())
+    assert received == ["First."]
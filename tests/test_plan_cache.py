@@ -0,0 +1,95 @@
+import asyncio
+import sqlite3
+
+from plan_cache import PlanCache, _rebase_budget, plan_key
+
+
+def test_nearby_budgets_share_a_bucket():
+    assert plan_key(2740, ["museums"], "luxury") == plan_key(2510, ["museums"], "luxury")
+    assert plan_key(2740, ["museums"], "luxury") != plan_key(2760, ["museums"], "luxury")
+
+
+def test_small_budgets_round_up_to_the_first_bucket():
+    assert plan_key(100, [], None) == plan_key(500, [], None)
+
+
+def test_activities_are_normalized_as_a_set():
+    assert plan_key(3000, ["Museums ", "food", "museums", ""], None) == plan_key(3000, ["food", "museums"], None)
+
+
+def test_prices_are_part_of_the_key():
+    assert plan_key(3000, ["food"], "economy", prices=(450, 120)) != plan_key(3000, ["food"], "economy", prices=(600, 120))
+    assert plan_key(3000, ["food"], "economy", prices=()) == plan_key(3000, ["food"], "economy")
+
+
+def test_rebase_budget_rewrites_every_form_of_the_amount():
+    text = "Your $3,000 budget covers it, leaving $3000 minus flights, not $30000."
+    assert _rebase_budget(text, 3000, 2800) == "Your $2,800 budget covers it, leaving $2,800 minus flights, not $30000."
+
+
+def test_rebase_budget_leaves_other_amounts_alone():
+    text = "Flight $450, hotel $120 a night, within your $3,000."
+    assert _rebase_budget(text, 3000, 3000) == text
+    assert _rebase_budget(text, 3000, 3200) == "Flight $450, hotel $120 a night, within your $3,200."
+
+
+def test_entries_are_shared_through_sqlite(tmp_path):
+    path = str(tmp_path / "plans.sqlite")
+
+    async def generate():
+        return "Your $3,000 plan."
+
+    first, second = PlanCache(db_path=path), PlanCache(db_path=path)
+    assert asyncio.run(first.get_or_generate("summary", "k", 3000, generate)) == "Your $3,000 plan."
+    assert asyncio.run(second.get("summary", "k", 2800)) == "Your $2,800 plan."
+    assert (second.hits, second.disk_hits) == (1, 1)
+
+
+def test_locked_database_is_a_miss_without_blocking_the_loop(tmp_path):
+    path = str(tmp_path / "plans.sqlite")
+    asyncio.run(PlanCache(db_path=path).put("summary", "k", "Your $3,000 plan.", 3000))
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    cache = PlanCache(db_path=path)
+    ticks = 0
+
+    async def lookup():
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.ensure_future(tick())
+        try:
+            return await cache.get("summary", "k", 3000)
+        finally:
+            ticker.cancel()
+
+    try:
+        assert asyncio.run(lookup()) is None
+    finally:
+        other.close()
+    assert cache.misses == 1
+    # The loop kept running while the lookup waited on the lock
+    assert ticks > 10
+
+
+def test_concurrent_requests_share_one_generation():
+    cache = PlanCache(db_path=None)
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "Your $3,000 plan."
+
+    async def both():
+        return await asyncio.gather(
+            cache.get_or_generate("itinerary", "k", 3000, generate),
+            cache.get_or_generate("itinerary", "k", 3100, generate),
+        )
+
+    assert asyncio.run(both()) == ["Your $3,000 plan.", "Your $3,100 plan."]
+    assert len(calls) == 1
+    assert cache.joins == 1
@@ -0,0 +1,52 @@
+import pytest
+
+from slot_extraction import extract_activities, extract_budget, extract_slots
+
+ALL_SLOTS = ["budget", "activities", "preference"]
+
+
+@pytest.mark.parametrize("text, budget", [
+    ("about three thousand dollars", 3000),
+    ("$2,500", 2500),
+    ("2.5k", 2500),
+    ("maybe 4 grand", 4000),
+    ("twelve hundred bucks", 1200),
+])
+def test_budget_amounts(text, budget):
+    assert extract_budget(text)[0] == budget
+
+
+def test_durations_are_not_budgets():
+    assert extract_budget("10 days")[0] is None
+
+
+def test_activities():
+    activities, confidence = extract_activities("I love hiking and museums")
+    assert sorted(activities) == ["hiking", "museums"]
+    assert confidence > 0
+
+
+def test_only_missing_slots_are_filled():
+    assert extract_slots("3000 dollars, luxury please", ["preference"], asked="preference") == {"preference": "luxury"}
+
+
+@pytest.mark.parametrize("text, budget", [
+    ("My budget is 2000 dollars", 2000),
+    ("I have a budget of five thousand", 5000),
+])
+def test_budget_answer_mentioning_budget_is_not_a_preference(text, budget):
+    assert extract_slots(text, ALL_SLOTS, asked="budget") == {"budget": budget}
+
+
+def test_loose_economy_words_only_count_when_preference_was_asked():
+    assert "preference" not in extract_slots("I would say 2000, keep it simple", ALL_SLOTS, asked="budget")
+    assert extract_slots("keep it simple", ["preference"], asked="preference") == {"preference": "economy"}
+
+
+@pytest.mark.parametrize("text, preference", [
+    ("3000, somewhere cheap", "economy"),
+    ("3000 and I want luxury", "luxury"),
+    ("3k, museums and food, nothing fancy", "economy"),
+])
+def test_explicit_preference_fills_from_another_answer(text, preference):
+    assert extract_slots(text, ALL_SLOTS, asked="budget")["preference"] == preference
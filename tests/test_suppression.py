@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from suppression import BloomFilter, SuppressionList
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    numbers = [f"+1555{i:07d}" for i in range(1000)]
+    for number in numbers:
+        bloom.add(number)
+    assert all(number in bloom for number in numbers)
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"+1555{i:07d}")
+    hits = sum(f"+1666{i:07d}" in bloom for i in range(10000))
+    assert hits < 300
+
+
+def test_bloom_filter_bits_round_trip():
+    bloom = BloomFilter(100, 0.01)
+    bloom.add("+15550000001")
+    copy = BloomFilter(100, 0.01, bytes(bloom.bits))
+    assert "+15550000001" in copy
+
+
+@pytest.fixture
+def suppression(tmp_path):
+    suppression = SuppressionList(str(tmp_path / "suppression.sqlite"), capacity=100, fp_rate=0.01)
+    suppression.open()
+    suppression.load()
+    yield suppression
+    suppression.close()
+
+
+def test_added_numbers_are_suppressed(suppression):
+    assert "+15550000001" not in suppression
+    assert suppression.add_many(["+15550000001", "+15550000002", "+15550000001"], "dnc") == 2
+    assert "+15550000001" in suppression
+    assert "+15550000003" not in suppression
+    assert suppression.count() == 2
+
+
+def test_filter_is_rebuilt_larger_past_capacity(suppression):
+    suppression.add_many([f"+1555{i:07d}" for i in range(250)], "dnc")
+    assert suppression.filter.capacity >= 250
+    assert suppression.filter.count == 250
+    assert all(f"+1555{i:07d}" in suppression for i in range(250))
+
+
+def test_lookups_during_a_rebuild_use_the_complete_filter(suppression, monkeypatch):
+    suppression.add_many([f"+1555{i:07d}" for i in range(100)], "dnc")
+    add = BloomFilter.add
+    seen = []
+
+    def checked_add(bloom, number):
+        # What the event loop would see while add_called() rebuilds in a thread
+        seen.append("+15550000000" in suppression)
+        add(bloom, number)
+
+    monkeypatch.setattr(BloomFilter, "add", checked_add)
+    suppression.add_many(["+15559999999"], "called")
+    assert suppression.filter.capacity > 100
+    assert seen and all(seen)
+
+
+def test_saved_filter_is_reloaded_and_topped_up(tmp_path):
+    path = str(tmp_path / "suppression.sqlite")
+    first = SuppressionList(path, capacity=100, fp_rate=0.01)
+    first.open()
+    first.load()
+    first.add_many(["+15550000001"], "dnc")
+    first.close()
+
+    # Another process adds a number without loading the filter
+    writer = SuppressionList(path, capacity=100, fp_rate=0.01)
+    writer.open()
+    writer.add("+15550000002", "called")
+    writer.close()
+
+    second = SuppressionList(path, capacity=100, fp_rate=0.01)
+    second.open()
+    second.load()
+    try:
+        assert "+15550000001" in second
+        assert "+15550000002" in second
+        assert second.filter.count == 2
+    finally:
+        second.close()
+
+
+def test_add_called_reports_failures_instead_of_raising(suppression):
+    assert asyncio.run(suppression.add_called("+15550000001", "campaign 1")) is True
+    assert "+15550000001" in suppression
+    suppression._db.close()
+    assert asyncio.run(suppression.add_called("+15550000002", "campaign 1")) is False
+    suppression._db = None